@@ -0,0 +1,167 @@
+import os
+import queue
+import time
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from blackjack_env import BlackjackEnv
+from dqn_agent import DQNAgent, build_network
+
+
+def play_episodes(env, model, rng, epsilon, num_episodes):
+    # Plays num_episodes epsilon-greedy episodes with a CPU policy network, returning them as one transition batch
+    action_size = env.action_space.n
+    states, actions, rewards, next_states, dones = [], [], [], [], []
+    wins = losses = 0
+    for _ in range(num_episodes):
+        state = env.reset()
+        for _ in range(500):  # Limit each episode to 500 steps
+            if rng.random() <= epsilon:
+                action = int(rng.integers(action_size))
+            else:
+                with torch.no_grad():
+                    action = int(model(torch.from_numpy(state).unsqueeze(0)).argmax())
+            next_state, reward, done, info = env.step(action)
+            states.append(state)
+            actions.append(action)
+            rewards.append(reward)
+            next_states.append(next_state)
+            dones.append(done)
+            state = next_state
+            if done:
+                break
+        wins += info.get('win_loss') == 'player'
+        losses += info.get('win_loss') == 'dealer'
+
+    return {
+        'episodes': num_episodes,
+        'wins': wins,
+        'losses': losses,
+        'states': np.array(states, dtype=np.float32),
+        'actions': np.array(actions, dtype=np.int8),
+        'rewards': np.array(rewards, dtype=np.float32),
+        'next_states': np.array(next_states, dtype=np.float32),
+        'dones': np.array(dones, dtype=np.bool_),
+    }
+
+
+def _run_actor(actor_id, shared_model, weights_lock, weights_version, epsilon, transition_queue, stop_event,
+               chunk_episodes, seed):
+    torch.set_num_threads(1)  # One core per actor
+    rng = np.random.default_rng(seed)
+    env = BlackjackEnv(seed=rng.spawn(1)[0])
+    model = build_network(env.observation_space.shape[0], env.action_space.n)
+    version = -1
+
+    while not stop_event.is_set():
+        # Refresh the local policy copy whenever the learner has published new weights
+        if weights_version.value != version:
+            with weights_lock:
+                version = weights_version.value
+                model.load_state_dict(shared_model.state_dict())
+
+        chunk = play_episodes(env, model, rng, epsilon.value, chunk_episodes)
+        chunk['actor_id'] = actor_id
+        # Blocks while the queue is full, so actors never run far ahead of the learner
+        while not stop_event.is_set():
+            try:
+                transition_queue.put(chunk, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+
+def train_actor_learner(episodes, model_path=None, num_actors=None, weight_sync_interval=50, queue_size=8,
+                        chunk_episodes=20, batch_size=64, print_interval=1000, seed=0):
+    """Trains a DQNAgent with ``num_actors`` processes generating experience in parallel.
+
+    Each actor plays ``chunk_episodes`` episodes per transition batch with its own BlackjackEnv and a CPU copy
+    of the policy, refreshed once the learner publishes new weights (every ``weight_sync_interval`` updates).
+    At most ``queue_size`` batches wait for the learner; actors block beyond that.
+
+    ``seed`` fixes each actor's and the learner's own streams, but the run as a whole is not reproducible:
+    the learner takes batches in arrival order and actors play with whichever weights were last published.
+    Use the single-process ``train_dqn`` for bit-for-bit repeatable runs.
+    """
+    if num_actors is None:
+        num_actors = max(1, (os.cpu_count() or 2) - 1)  # Leave one core to the learner
+    # Learner and actors get independent child streams of one seed
+    learner_seed, *actor_seeds = np.random.SeedSequence(seed).spawn(num_actors + 1)
+    env = BlackjackEnv(seed=learner_seed)
+    agent = DQNAgent(env, seed=learner_seed.spawn(1)[0])
+    if model_path:
+        agent.load(model_path)
+
+    ctx = mp.get_context('spawn')
+    shared_model = build_network(env.observation_space.shape[0], env.action_space.n)
+    shared_model.load_state_dict(agent.model.state_dict())
+    shared_model.share_memory()
+    weights_lock = ctx.Lock()
+    weights_version = ctx.Value('i', 0)
+    epsilon = ctx.Value('d', agent.epsilon)
+    transition_queue = ctx.Queue(maxsize=queue_size)
+    stop_event = ctx.Event()
+
+    actors = [
+        ctx.Process(target=_run_actor, daemon=True,
+                    args=(i, shared_model, weights_lock, weights_version, epsilon, transition_queue, stop_event,
+                          chunk_episodes, actor_seed))
+        for i, actor_seed in enumerate(actor_seeds)
+    ]
+    for actor in actors:
+        actor.start()
+
+    episode_count = 0
+    total_wins = 0
+    total_losses = 0
+    last_print = 0
+    start_time = time.monotonic()
+    try:
+        while episode_count < episodes:
+            # Train continuously, only waiting on the actors until the buffer can fill a batch
+            block = len(agent.memory) <= batch_size
+            while True:
+                try:
+                    chunk = transition_queue.get(block=block, timeout=1.0 if block else None)
+                except queue.Empty:
+                    break
+                agent.memory.add_batch(chunk['states'], chunk['actions'], chunk['rewards'], chunk['next_states'],
+                                       chunk['dones'])
+                episode_count += chunk['episodes']
+                total_wins += chunk['wins']
+                total_losses += chunk['losses']
+                block = False
+
+            if len(agent.memory) > batch_size:
+                agent.replay(batch_size)
+                epsilon.value = agent.epsilon
+                if agent.train_steps % weight_sync_interval == 0:
+                    with weights_lock:
+                        shared_model.load_state_dict(agent.model.state_dict())
+                        weights_version.value += 1
+
+            if episode_count - last_print >= print_interval:
+                last_print = episode_count
+                elapsed = time.monotonic() - start_time
+                print('--------------------------------------------------')
+                print(f"Episode: {episode_count}, Updates: {agent.train_steps}, Wins: {total_wins},"
+                      f" Losses: {total_losses}, winrate: {total_wins / max(total_wins + total_losses, 1):.2f},"
+                      f" epsilon: {agent.epsilon:.3f}, episodes/sec: {episode_count / elapsed:.0f},"
+                      f" updates/sec: {agent.train_steps / elapsed:.0f}")
+                print('--------------------------------------------------')
+    finally:
+        stop_event.set()
+        # Drain the queue so actors blocked on it can exit
+        while any(actor.is_alive() for actor in actors):
+            try:
+                while True:
+                    transition_queue.get_nowait()
+            except queue.Empty:
+                pass
+            for actor in actors:
+                actor.join(timeout=0.1)
+
+    agent.save("final_model.pth")
+    return agent
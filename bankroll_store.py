@@ -0,0 +1,132 @@
+import atexit
+import json
+import os
+import threading
+
+
+class BankrollStore:
+    """Thread-safe in-memory bankrolls; nothing is written to disk.
+
+    Suited to training and simulation, where many Game instances can share one store.
+    """
+
+    def __init__(self, balances=None):
+        self._balances = dict(balances or {})
+        self._lock = threading.Lock()
+
+    def load(self, key, default):
+        with self._lock:
+            return self._balances.get(key, default)
+
+    def save(self, key, money):
+        with self._lock:
+            self._balances[key] = money
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class FileBankrollStore(BankrollStore):
+    """Bankrolls kept in memory and written behind to a JSON file.
+
+    The file is read once. A background thread writes it after every ``flush_every`` saves or
+    ``flush_interval`` seconds with pending saves, whichever comes first; passing ``None`` for both
+    only writes on ``close``, which also runs at interpreter exit. Every write goes to a temporary
+    file that is then renamed over ``path``, so readers never see a partial file. A failed background
+    write is raised from the next ``flush`` or ``close``.
+    """
+
+    def __init__(self, path='player_data.json', flush_every=100, flush_interval=5.0):
+        super().__init__(self._read(path))
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._error = None
+        self._thread = None
+        if flush_every is not None or flush_interval is not None:
+            self._thread = threading.Thread(target=self._run, name='bankroll-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, key, money):
+        with self._lock:
+            self._balances[key] = money
+            self._pending += 1
+            due = self.flush_every is not None and self._pending >= self.flush_every
+        if due:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self._write()
+            except Exception as error:
+                self._error = error  # Raised from the next flush() or close(); the thread keeps running
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def flush(self):
+        self._raise_error()
+        self._write()
+
+    def _write(self):
+        # The write lock covers the snapshot too, so an older snapshot never replaces a newer file
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                data = dict(self._balances)
+                self._pending = 0
+            try:
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as file:
+                    json.dump(data, file)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                with self._lock:
+                    self._pending += 1  # Still unwritten; retried on the next flush
+                raise
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._thread is not None:
+            self._wakeup.set()
+            self._thread.join()
+        self._write()
+        self._raise_error()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    # Process-wide store for player_data.json, shared by every Game that is not given its own
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = FileBankrollStore()
+        return _default_store
@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from bankroll_store import BankrollStore
+from blackjack_env import BlackjackEnv
+from dqn_agent import DQNAgent
+from game_logic import Game
+from vec_blackjack_env import VecBlackjackEnv
+
+
+def _throughput(run_chunk, duration):
+    # Calls run_chunk() (which returns how many operations it did) until duration seconds have passed
+    run_chunk()  # Warm-up
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        count += run_chunk()
+    return count / (time.perf_counter() - start)
+
+
+def bench_game_rounds(duration):
+    game = Game(num_decks=6, bankroll_store=BankrollStore())
+
+    def run_chunk(rounds=1000):
+        for _ in range(rounds):
+            game.start_round()
+            while game.get_hand_value(game.player.hand) < 17:
+                game.player_action('hit')
+            game.dealer_action()
+            game.check_winner()
+        return rounds
+
+    return {'game_rounds_per_sec': _throughput(run_chunk, duration)}
+
+
+def bench_env_steps(duration):
+    env = BlackjackEnv(bankroll_store=BankrollStore())
+    rng = np.random.default_rng(0)
+    env.reset()
+
+    def run_chunk(steps=1000):
+        for action in rng.integers(0, 3, size=steps):
+            _, _, done, _ = env.step(int(action))
+            if done:
+                env.reset()
+        return steps
+
+    return {'env_steps_per_sec': _throughput(run_chunk, duration)}
+
+
+def bench_vec_env_steps(duration, num_envs=1024):
+    env = VecBlackjackEnv(num_envs=num_envs, initial_money=10000, seed=0)
+    rng = np.random.default_rng(0)
+    env.reset()
+
+    def run_chunk(steps=10):
+        for _ in range(steps):
+            env.step(rng.integers(0, 3, size=num_envs))
+        return steps * num_envs
+
+    return {'vec_env_steps_per_sec': _throughput(run_chunk, duration)}
+
+
+def _filled_agent(transitions=5000):
+    env = BlackjackEnv(bankroll_store=BankrollStore())
+    agent = DQNAgent(env)
+    state = env.reset()
+    for _ in range(transitions):
+        action = env.action_space.sample()
+        next_state, reward, done, _ = env.step(action)
+        agent.remember(state, action, reward, next_state, done)
+        state = env.reset() if done else next_state
+    return agent, env
+
+
+def bench_agent_act(duration):
+    agent, env = _filled_agent(transitions=0)
+    agent.epsilon = 0.0  # Always take the network path
+    state = env.reset()
+    latencies = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        t0 = time.perf_counter_ns()
+        agent.act(state)
+        latencies.append(time.perf_counter_ns() - t0)
+    latencies = np.array(latencies[10:]) / 1000.0  # Drop warm-up calls, in microseconds
+    return {
+        'act_latency_p50_us': float(np.percentile(latencies, 50)),
+        'act_latency_p90_us': float(np.percentile(latencies, 90)),
+        'act_latency_p99_us': float(np.percentile(latencies, 99)),
+    }
+
+
+def bench_agent_act_batch(duration, num_states=1024):
+    agent, _ = _filled_agent(transitions=0)
+    agent.epsilon = 0.0
+    states = np.random.default_rng(0).random((num_states, agent.env.observation_space.shape[0]), dtype=np.float32)
+
+    def run_chunk(calls=10):
+        for _ in range(calls):
+            agent.act_batch(states)
+        return calls * num_states
+
+    return {'act_batch_decisions_per_sec': _throughput(run_chunk, duration)}
+
+
+def bench_agent_replay(duration, batch_size=64):
+    agent, _ = _filled_agent()
+
+    def run_chunk(updates=20):
+        for _ in range(updates):
+            agent.replay(batch_size)
+        return updates
+
+    return {'replay_updates_per_sec': _throughput(run_chunk, duration)}
+
+
+def bench_train_dqn(duration, episodes=200):
+    from main import train_dqn
+
+    # train_dqn writes its model and plot to the working directory; bankrolls stay in memory like the other benchmarks
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            start = time.perf_counter()
+            runs = 0
+            while runs == 0 or time.perf_counter() - start < duration:
+                train_dqn(episodes, plot_path=os.path.join(tmp, 'stats.png'), bankroll_store=BankrollStore())
+                runs += 1
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    return {'train_episodes_per_sec': runs * episodes / elapsed}
+
+
+BENCHMARKS = {
+    'game': bench_game_rounds,
+    'env': bench_env_steps,
+    'vec_env': bench_vec_env_steps,
+    'act': bench_agent_act,
+    'act_batch': bench_agent_act_batch,
+    'replay': bench_agent_replay,
+    'train': bench_train_dqn,
+}
+
+
+def lower_is_better(metric):
+    return metric.endswith('_us')
+
+
+def run_benchmarks(names, duration):
+    results = {}
+    for name in names:
+        metrics = BENCHMARKS[name](duration)
+        for metric, value in metrics.items():
+            print(f"{metric:28s} {value:14.1f}")
+        results.update(metrics)
+    return {
+        'metrics': results,
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'torch': torch.__version__,
+            'machine': platform.machine(),
+            'torch_threads': torch.get_num_threads(),
+            'timestamp': time.time(),
+        },
+    }
+
+
+def compare(results, baseline, threshold):
+    # Metrics that got worse than the baseline by more than threshold (a fraction)
+    regressions = []
+    for metric, value in results['metrics'].items():
+        reference = baseline['metrics'].get(metric)
+        if not reference:
+            continue
+        change = (value - reference) / reference
+        if lower_is_better(metric):
+            change = -change
+        status = 'REGRESSION' if change < -threshold else 'ok'
+        print(f"{metric:28s} {reference:14.1f} -> {value:14.1f} ({change:+.1%}) {status}")
+        if status != 'ok':
+            regressions.append(metric)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmarks for the game, env, agent and training loop")
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--duration', type=float, default=2.0, help="seconds spent in each benchmark")
+    parser.add_argument('--threads', type=int, default=1, help="torch intra-op threads")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default='benchmark_baseline.json')
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative slowdown before failing")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    torch.set_num_threads(args.threads)
+    results = run_benchmarks(args.benchmarks or list(BENCHMARKS), args.duration)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    return 1 if compare(results, baseline, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,17 @@
 import gym
 from gym import spaces
 import numpy as np
-from game_logic import Game
+from game_logic import Game, CARD_VALUES
 
 class BlackjackEnv(gym.Env):
-    def __init__(self):
+    def __init__(self, bankroll_store=None, seed=None):
         super(BlackjackEnv, self).__init__()
-        self.game = Game(num_decks=6)
+        # seed may be an int, a SeedSequence or a Generator; the deck and action space get independent child streams
+        deck_rng, action_rng = np.random.default_rng(seed).spawn(2)
+        self.game = Game(num_decks=6, bankroll_store=bankroll_store, rng=deck_rng)
         self.observation_space = spaces.Box(low=0, high=1, shape=(5,), dtype=np.float32)
         self.action_space = spaces.Discrete(3)  # 0: Stand, 1: Hit, 2: Double
+        self.action_space.seed(int(action_rng.integers(2 ** 31)))
         self.min_bet = 10  # Minimum bet amount
         self.max_bet = 500  # Maximum bet amount
 
@@ -29,8 +32,7 @@ class BlackjackEnv(gym.Env):
         done = False
         reward = 0
         player_value = self.game.get_hand_value(self.game.player.hand)
-        dealer_upcard_value = self.game.get_hand_value([self.game.dealer.hand[0]])
-        has_ace = any(card.value == 'A' for card in self.game.player.hand)
+        has_ace = self.game.player.hand.aces > 0
 
         if action == 0:  # Stand
             if player_value < 11:
@@ -82,7 +84,6 @@ class BlackjackEnv(gym.Env):
 
     def _check_immediate_blackjack(self):
         player_value = self.game.get_hand_value(self.game.player.hand)
-        dealer_upcard_value = self.game.get_hand_value([self.game.dealer.hand[0]])
         done = False
         reward = 0
 
@@ -120,8 +121,8 @@ class BlackjackEnv(gym.Env):
 
     def _get_state(self):
         player_value = self.game.get_hand_value(self.game.player.hand)
-        dealer_value = self.game.get_hand_value([self.game.dealer.hand[0]])
-        usable_ace = int(any(card.value == 'A' for card in self.game.player.hand) and player_value + 10 <= 21)
+        dealer_value = CARD_VALUES[self.game.dealer.hand[0]]
+        usable_ace = int(self.game.player.hand.aces > 0 and player_value + 10 <= 21)
         bankroll = self.game.player.money / 1000.0  # Normalize bankroll for state representation
         return np.array(
             [player_value / 32.0, dealer_value / 11.0, usable_ace, bankroll, self.game.player.current_bet / 500],
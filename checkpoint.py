@@ -0,0 +1,189 @@
+import io
+import os
+import pickle
+import queue
+import random
+import threading
+
+import numpy as np
+import torch
+
+
+def _to_cpu(obj):
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().cpu().clone()
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_cpu(v) for v in obj]
+    return obj
+
+
+def _capture_env(env):
+    # The shoe and bankroll of a BlackjackEnv, so a resumed run deals the same cards as an uninterrupted one
+    game = getattr(env, 'game', None)
+    if game is None:
+        return None
+    deck = game.deck
+    return {
+        'deck_rng': deck.rng.bit_generator.state,
+        'cards': deck.cards.copy(),
+        'position': deck.position,
+        'shuffles': deck._shuffles.copy(),
+        'player_money': game.player.money,
+    }
+
+
+def _restore_env(env, state):
+    game = getattr(env, 'game', None)
+    if game is None or state is None:
+        return
+    deck = game.deck
+    deck.rng.bit_generator.state = state['deck_rng']
+    deck.cards = state['cards'].copy()
+    deck.position = state['position']
+    deck._shuffles = state['shuffles'].copy()
+    game.player.money = state['player_money']
+
+
+def capture_state(agent, episode):
+    # Copies everything needed to resume training, so the agent can keep training while it is written
+    memory = agent.memory
+    size = len(memory)
+    if memory.persistent:
+        memory.flush()  # The buffer resumes from its own files, only its sampling RNG is checkpointed
+        size = 0
+    state = {
+        'training': {
+            'model': {k: v.detach().cpu().clone() for k, v in agent.model.state_dict().items()},
+            'target_model': {k: v.detach().cpu().clone() for k, v in agent.target_model.state_dict().items()},
+            'optimizer': _to_cpu(agent.optimizer.state_dict()),
+            'epsilon': agent.epsilon,
+            'train_steps': agent.train_steps,
+            'episode': episode,
+            'rng': {
+                'python': random.getstate(),
+                'numpy': np.random.get_state(),
+                'torch': torch.get_rng_state(),
+                'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+                'memory': memory.rng.bit_generator.state,
+                'agent': agent.rng.bit_generator.state,
+            },
+            'memory_position': memory.position,
+            'memory_persistent': memory.persistent,
+            'env': _capture_env(agent.env),
+        },
+        'memory': {
+            'states': memory.states[:size].copy(),
+            'actions': memory.actions[:size].copy(),
+            'rewards': memory.rewards[:size].copy(),
+            'next_states': memory.next_states[:size].copy(),
+            'dones': memory.dones[:size].copy(),
+        },
+    }
+    if memory.prioritized:
+        state['training']['memory_priorities'] = memory.priority_state()
+        state['memory']['priorities'] = memory.priorities[:len(memory)].copy()
+    return state
+
+
+def write_state(state, path):
+    # One .npz file: replay arrays stored raw plus the pickled training state; replaced atomically
+    blob = io.BytesIO()
+    pickle.dump(state['training'], blob, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, training=np.frombuffer(blob.getbuffer(), dtype=np.uint8), **state['memory'])
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_checkpoint(agent, episode, path):
+    write_state(capture_state(agent, episode), path)
+
+
+def load_checkpoint(agent, path):
+    # Restores agent and global RNGs from a checkpoint; returns the episode it was taken after
+    with np.load(path) as data:
+        training = pickle.loads(data['training'].tobytes())
+        memory = agent.memory
+        if not training['memory_persistent']:
+            size = len(data['actions'])
+            memory.states[:size] = data['states']
+            memory.actions[:size] = data['actions']
+            memory.rewards[:size] = data['rewards']
+            memory.next_states[:size] = data['next_states']
+            memory.dones[:size] = data['dones']
+            memory.size = size
+            memory.position = training['memory_position']
+        if 'memory_priorities' in training and memory.prioritized:
+            memory.restore_priorities(data['priorities'], training['memory_priorities'])
+    memory.rng.bit_generator.state = training['rng']['memory']
+    if 'agent' in training['rng']:
+        agent.rng.bit_generator.state = training['rng']['agent']
+    _restore_env(agent.env, training.get('env'))
+
+    agent.model.load_state_dict(training['model'])
+    agent.target_model.load_state_dict(training['target_model'])
+    agent.optimizer.load_state_dict(training['optimizer'])
+    agent.epsilon = training['epsilon']
+    agent.train_steps = training['train_steps']
+
+    random.setstate(training['rng']['python'])
+    np.random.set_state(training['rng']['numpy'])
+    torch.set_rng_state(training['rng']['torch'])
+    if training['rng']['cuda'] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(training['rng']['cuda'])
+    return training['episode']
+
+
+class CheckpointWriter:
+    """Writes checkpoints on a background thread.
+
+    ``save`` only takes the in-memory snapshot; serialization and disk I/O happen on the writer
+    thread. If the previous checkpoint is still being written, the new one waits in a one-slot queue.
+    A failed write is raised from the next ``save`` or ``close``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def save(self, agent, episode):
+        self._put(capture_state(agent, episode))
+
+    def _put(self, item):
+        while True:
+            self._raise_error()
+            if not self._thread.is_alive():
+                raise RuntimeError("Checkpoint writer thread has stopped")
+            try:
+                self._queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                pass
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            state = self._queue.get()
+            if state is None:
+                break
+            try:
+                write_state(state, self.path)
+            except Exception as error:
+                self._error = error  # Keep consuming so save() never blocks on a full queue
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)  # The writer keeps draining the queue even after a failed write
+            self._thread.join()
+        self._raise_error()
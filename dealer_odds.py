@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Dealer outcomes, in the order of every distribution returned here
+OUTCOMES = ('17', '18', '19', '20', '21', 'bust', 'blackjack')
+BUST = 5
+BLACKJACK = 6
+
+# Compositions count the cards left per value: index 0 = Ace, 1-8 = 2-9, 9 = every ten-valued card
+INFINITE_DECK_PROBS = (1 / 13,) * 9 + (4 / 13,)
+
+
+def shoe_composition(num_decks=6):
+    return (4 * num_decks,) * 9 + (16 * num_decks,)
+
+
+def remove_cards(composition, card_values):
+    # Takes the given card values (Ace = 1 or 11) out of a composition
+    counts = list(composition)
+    for value in card_values:
+        counts[(value - 1) % 10] -= 1
+    return tuple(counts)
+
+
+def bucket_composition(composition, resolution=1):
+    # Rounds every count to a multiple of resolution so that nearby shoes share cache entries
+    if resolution <= 1:
+        return tuple(composition)
+    return tuple(int(resolution * round(count / resolution)) for count in composition)
+
+
+def _settled(hard_total, has_ace, num_cards):
+    # Outcome index once the dealer stops drawing (stands on 17, soft 17 included), else None
+    value = hard_total + 10 if has_ace and hard_total + 10 <= 21 else hard_total
+    if num_cards < 2:
+        return None
+    if num_cards == 2 and value == 21:
+        return BLACKJACK
+    if value > 21:
+        return BUST
+    if value >= 17:
+        return value - 17
+    return None
+
+
+def _outcome(index):
+    dist = np.zeros(len(OUTCOMES))
+    dist[index] = 1.0
+    return dist
+
+
+@lru_cache(maxsize=None)
+def _infinite_deck(hard_total, has_ace, num_cards):
+    settled = _settled(hard_total, has_ace, num_cards)
+    if settled is not None:
+        return _outcome(settled)
+    dist = np.zeros(len(OUTCOMES))
+    for i, p in enumerate(INFINITE_DECK_PROBS):
+        dist += p * _infinite_deck(hard_total + i + 1, has_ace or i == 0, min(num_cards + 1, 3))
+    return dist
+
+
+@lru_cache(maxsize=1 << 18)
+def _finite_shoe(hard_total, has_ace, num_cards, composition):
+    settled = _settled(hard_total, has_ace, num_cards)
+    if settled is not None:
+        return _outcome(settled)
+    dist = np.zeros(len(OUTCOMES))
+    remaining = sum(composition)
+    for i, count in enumerate(composition):
+        if count == 0:
+            continue
+        drawn = composition[:i] + (count - 1,) + composition[i + 1:]
+        dist += count / remaining * _finite_shoe(hard_total + i + 1, has_ace or i == 0, min(num_cards + 1, 3), drawn)
+    return dist
+
+
+@lru_cache(maxsize=4096)
+def _dealer_distribution(upcard, composition):
+    hard_total = 1 if upcard == 11 else upcard
+    if composition is None:
+        return _infinite_deck(hard_total, upcard == 11, 1)
+    return _finite_shoe(hard_total, upcard == 11, 1, composition)
+
+
+def dealer_distribution(upcard, composition=None, resolution=1):
+    """Exact probabilities of the dealer finishing on each of OUTCOMES.
+
+    ``upcard`` is the upcard value (2-11, Ace = 11). ``composition`` holds the cards left in the
+    shoe with the upcard already removed; ``None`` means an infinite deck.
+    """
+    if composition is not None:
+        composition = bucket_composition(composition, resolution)
+    return _dealer_distribution(upcard, composition).copy()
+
+
+def finish_distribution(hard_total, has_ace, num_cards, composition=None):
+    # Outcome probabilities for a dealer hand already holding num_cards cards (composition excludes them)
+    if composition is None:
+        return _infinite_deck(hard_total, has_ace, min(num_cards, 3)).copy()
+    return _finite_shoe(hard_total, has_ace, min(num_cards, 3), tuple(composition)).copy()
+
+
+def stand_ev(player_total, upcard, composition=None, resolution=1):
+    # Expected result of standing on player_total, in units of the bet (natural blackjacks excluded)
+    if player_total > 21:
+        return -1.0
+    dist = dealer_distribution(upcard, composition, resolution)
+    totals = np.arange(17, 22)
+    win = dist[BUST] + dist[:BUST][totals < player_total].sum()
+    lose = dist[BLACKJACK] + dist[:BUST][totals > player_total].sum()
+    return win - lose
+
+
+def stand_ev_table(composition=None, resolution=1):
+    # Stand EVs indexed by [player total 0-21, dealer upcard 0-11]; upcards 0 and 1 are left at 0
+    table = np.zeros((22, 12))
+    for upcard in range(2, 12):
+        for player_total in range(22):
+            table[player_total, upcard] = stand_ev(player_total, upcard, composition, resolution)
+    return table
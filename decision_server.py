@@ -0,0 +1,277 @@
+import argparse
+import asyncio
+import struct
+import time
+
+import numpy as np
+
+from bankroll_store import BankrollStore
+from blackjack_env import BlackjackEnv
+
+RESPONSE = struct.Struct('<Ib')  # Request id, action
+ERROR_ACTION = -1  # Sent in place of an action when the policy failed on the request's batch
+
+
+def request_struct(state_size):
+    return struct.Struct(f"<I{state_size}f")  # Request id, observation
+
+
+class MicroBatcher:
+    """Coalesces concurrent decision requests into batches for one policy.act_batch call each.
+
+    A batch is dispatched once it holds ``max_batch_size`` states or ``max_wait`` seconds after its first
+    request arrived, whichever comes first. Must be started with ``start()`` inside a running event loop.
+    """
+
+    def __init__(self, policy, max_batch_size=64, max_wait=0.002, latency_window=10000):
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_sizes = np.zeros(max_batch_size + 1, dtype=np.int64)  # Histogram of dispatched batch sizes
+        self.latencies = np.zeros(latency_window)  # Most recent request latencies in seconds, as a ring
+        self.latency_count = 0
+        self.queue = None
+        self._task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        # wait_for can swallow a cancellation that lands just as its queue.get() completes, so cancel until done
+        while not self._task.done():
+            self._task.cancel()
+            await asyncio.wait([self._task], timeout=0.1)
+        # Requests still queued will never be batched; their callers get an error instead of waiting forever
+        pending = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        self._fail(pending, ConnectionError("Decision server stopped"))
+
+    async def decide(self, state):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((state, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self.queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        pass
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                self._dispatch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            self._fail(batch, ConnectionError("Decision server stopped"))
+            raise
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _dispatch(self, batch):
+        try:
+            actions = self.policy.act_batch(np.stack([state for state, _, _ in batch]).astype(np.float32))
+        except Exception as error:
+            self._fail(batch, error)
+            return
+        now = time.perf_counter()
+        self.batch_sizes[len(batch)] += 1
+        for (_, future, enqueued), action in zip(batch, actions):
+            self.latencies[self.latency_count % len(self.latencies)] = now - enqueued
+            self.latency_count += 1
+            if not future.done():
+                future.set_result(int(action))
+
+    def stats(self):
+        latencies = self.latencies[:min(self.latency_count, len(self.latencies))]
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if len(latencies) else (0.0, 0.0)
+        batches = int(self.batch_sizes.sum())
+        return {
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'batches': batches,
+            'decisions': self.latency_count,
+            'mean_batch_size': self.latency_count / batches if batches else 0.0,
+            'batch_size_histogram': {size: int(n) for size, n in enumerate(self.batch_sizes) if n},
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+        }
+
+
+class DecisionServer:
+    """TCP front end for a MicroBatcher.
+
+    Clients send fixed-size little-endian requests (uint32 id, state_size float32) and get back
+    (uint32 id, int8 action), with ``ERROR_ACTION`` as the action if the policy raised. Requests on one
+    connection may be pipelined; replies can come back out of order.
+    """
+
+    def __init__(self, batcher, state_size=5, host='127.0.0.1', port=0):
+        self.batcher = batcher
+        self.request = request_struct(state_size)
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # The bound port when started with port=0
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                try:
+                    data = await reader.readexactly(self.request.size)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break  # Client closed or reset the connection
+                request_id, *state = self.request.unpack(data)
+                task = asyncio.ensure_future(self._reply(writer, request_id, state))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def _reply(self, writer, request_id, state):
+        try:
+            action = await self.batcher.decide(np.array(state, dtype=np.float32))
+        except Exception:
+            action = ERROR_ACTION
+        if writer.is_closing():
+            return  # The client is gone
+        try:
+            writer.write(RESPONSE.pack(request_id, action))
+            await writer.drain()  # A client that stops reading holds back its replies instead of the buffer growing
+        except ConnectionError:
+            pass  # The client is gone; _handle closes the connection
+
+
+class DecisionClient:
+    """Asyncio client for DecisionServer; ``decide`` may be awaited concurrently from many tasks."""
+
+    def __init__(self, state_size=5):
+        self.request = request_struct(state_size)
+        self._futures = {}
+        self._next_id = 0
+        self._reader = None
+        self._writer = None
+        self._task = None
+
+    async def connect(self, host, port):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._task = asyncio.ensure_future(self._receive())
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def decide(self, state):
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) % (1 << 32)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        self._writer.write(self.request.pack(request_id, *state))
+        return await future
+
+    async def _receive(self):
+        try:
+            while True:
+                request_id, action = RESPONSE.unpack(await self._reader.readexactly(RESPONSE.size))
+                future = self._futures.pop(request_id)
+                if action == ERROR_ACTION:
+                    future.set_exception(RuntimeError(f"Decision server failed on request {request_id}"))
+                else:
+                    future.set_result(action)
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Decision server connection lost: {error}"))
+
+
+async def run_fleet(decide, num_tables=64, hands_per_table=100, max_steps=500):
+    # Load generator: num_tables BlackjackEnvs play concurrently, each awaiting decide(state) per move.
+    # Like train_dqn, a hand is cut off after max_steps since a refused double leaves it unchanged.
+    async def play(hands):
+        env = BlackjackEnv(bankroll_store=BankrollStore())
+        steps = 0
+        for _ in range(hands):
+            state = env.reset()
+            for _ in range(max_steps):
+                state, _, done, _ = env.step(await decide(state))
+                steps += 1
+                if done:
+                    break
+        return steps
+
+    start = time.perf_counter()
+    steps = await asyncio.gather(*(play(hands_per_table) for _ in range(num_tables)))
+    elapsed = time.perf_counter() - start
+    return {'hands': num_tables * hands_per_table, 'decisions': sum(steps), 'elapsed': elapsed,
+            'decisions_per_sec': sum(steps) / elapsed}
+
+
+async def serve(policy, host, port, max_batch_size, max_wait, stats_interval=10.0):
+    server = DecisionServer(MicroBatcher(policy, max_batch_size, max_wait), host=host, port=port)
+    await server.start()
+    print(f"Serving decisions on {server.host}:{server.port}")
+    while True:
+        await asyncio.sleep(stats_interval)
+        print(server.batcher.stats())
+
+
+async def load_test(policy, max_batch_size, max_wait, num_tables, hands_per_table):
+    server = DecisionServer(MicroBatcher(policy, max_batch_size, max_wait))
+    await server.start()
+    client = DecisionClient()
+    await client.connect(server.host, server.port)
+    try:
+        print(await run_fleet(client.decide, num_tables, hands_per_table))
+        print(server.batcher.stats())
+    finally:
+        await client.close()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    from numpy_policy import NumpyPolicy
+
+    parser = argparse.ArgumentParser(description="Micro-batching decision server for the trained policy")
+    parser.add_argument('--model', default='final_model.npz', help="weights exported by numpy_policy.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--load-test', type=int, metavar='TABLES', help="drive a local server from this many tables")
+    parser.add_argument('--hands', type=int, default=100, help="hands per table in the load test")
+    args = parser.parse_args()
+
+    policy = NumpyPolicy.load(args.model)
+    if args.load_test:
+        asyncio.run(load_test(policy, args.max_batch_size, args.max_wait_ms / 1000, args.load_test, args.hands))
+    else:
+        asyncio.run(serve(policy, args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000))
@@ -0,0 +1,441 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from actor_learner import play_episodes
+from bankroll_store import BankrollStore
+from blackjack_env import BlackjackEnv
+from dqn_agent import DQNAgent, build_network
+
+# Every message is a frame: header (JSON length, body length), a JSON object, then the zlib-compressed bytes of
+# the arrays it lists under 'arrays'. Only plain numeric arrays travel, never pickles.
+FRAME_HEADER = struct.Struct('<II')
+MAX_FRAME_BYTES = 256 << 20
+TRANSITION_KEYS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+
+def _recv_exactly(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Connection closed")
+        received += n
+    return bytes(data)
+
+
+def send_message(sock, message, arrays=None):
+    arrays = arrays or {}
+    message = dict(message, arrays=[[name, array.dtype.str, list(array.shape)] for name, array in arrays.items()])
+    header = json.dumps(message).encode()
+    body = zlib.compress(b''.join(np.ascontiguousarray(array).tobytes() for array in arrays.values()), 1) \
+        if arrays else b''
+    sock.sendall(FRAME_HEADER.pack(len(header), len(body)) + header + body)
+
+
+def recv_message(sock):
+    header_size, body_size = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))
+    if header_size + body_size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {header_size + body_size} bytes exceeds {MAX_FRAME_BYTES}")
+    message = json.loads(_recv_exactly(sock, header_size))
+    if not isinstance(message, dict) or not isinstance(message.get('arrays'), list):
+        raise ValueError("Frame header is not a message with an 'arrays' list")
+    layout = []
+    for entry in message.pop('arrays'):
+        if not (isinstance(entry, list) and len(entry) == 3 and isinstance(entry[1], str)
+                and isinstance(entry[2], list)):
+            raise ValueError(f"Malformed array entry {entry!r}")
+        name, dtype, shape = entry
+        if not all(type(n) is int and n >= 0 for n in shape):
+            raise ValueError(f"Invalid shape {shape} for array {name}")
+        try:
+            dtype = np.dtype(dtype)
+        except TypeError as error:
+            raise ValueError(f"Invalid dtype {dtype!r} for array {name}") from error
+        if dtype.hasobject:
+            raise ValueError(f"Refusing object array {name}")
+        layout.append((name, dtype, shape, int(np.prod(shape))))
+    expected = sum(count * dtype.itemsize for _, dtype, _, count in layout)
+    if expected > MAX_FRAME_BYTES:
+        raise ValueError(f"Arrays of {expected} bytes exceed {MAX_FRAME_BYTES}")
+
+    body = b''
+    if body_size:
+        # Bounded decompression, so a small frame cannot expand into an arbitrarily large buffer
+        decompressor = zlib.decompressobj()
+        body = decompressor.decompress(_recv_exactly(sock, body_size), MAX_FRAME_BYTES)
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError(f"Frame body decompresses to more than {MAX_FRAME_BYTES} bytes")
+    if len(body) != expected:
+        raise ValueError(f"Frame body holds {len(body)} bytes, its arrays declare {expected}")
+
+    arrays = {}
+    offset = 0
+    for name, dtype, shape, count in layout:
+        arrays[name] = np.frombuffer(body, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count * dtype.itemsize
+    return message, arrays
+
+
+class WorkerStats:
+    def __init__(self, worker_id, name, address):
+        self.worker_id = worker_id
+        self.name = name
+        self.address = address
+        self.registered = time.monotonic()
+        self.last_seen = self.registered
+        self.connected = True
+        self.chunks = 0
+        self.stale_chunks = 0
+        self.episodes = 0
+        self.steps = 0
+        self.transition_bytes = 0
+        self.weight_version = -1
+
+    def as_dict(self, now, worker_timeout):
+        elapsed = max(now - self.registered, 1e-9)
+        return {
+            'name': self.name,
+            'address': self.address,
+            'alive': self.connected and now - self.last_seen < worker_timeout,
+            'chunks': self.chunks,
+            'stale_chunks': self.stale_chunks,
+            'episodes': self.episodes,
+            'steps': self.steps,
+            'steps_per_sec': self.steps / elapsed,
+            'transition_bytes': self.transition_bytes,
+            'weight_version': self.weight_version,
+            'seconds_since_seen': now - self.last_seen,
+        }
+
+
+class ParameterServer:
+    """Learner that owns the DQNAgent and its replay memory and serves rollout workers over TCP.
+
+    Workers register, push compressed transition batches, pull the latest weights when their version is
+    out of date, and send heartbeats. The learner never waits on any single worker: a worker silent for
+    ``worker_timeout`` seconds is disconnected, and with ``max_staleness`` set, batches played with weights
+    more than that many versions old are dropped. Weights are republished every ``weight_sync_interval`` updates.
+    Batches are learned in arrival order, so a seeded run is not bit-for-bit reproducible.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, model_path=None, weight_sync_interval=50, chunk_episodes=20,
+                 queue_size=8, heartbeat_interval=1.0, worker_timeout=10.0, max_staleness=None, seed=None):
+        env_rng, agent_rng = np.random.default_rng(seed).spawn(2)
+        self.env = BlackjackEnv(bankroll_store=BankrollStore(), seed=env_rng)
+        self.agent = DQNAgent(self.env, seed=agent_rng)
+        if model_path:
+            self.agent.load(model_path)
+        self.weight_sync_interval = weight_sync_interval
+        self.chunk_episodes = chunk_episodes
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_timeout = worker_timeout
+        self.max_staleness = max_staleness
+
+        self.workers = {}
+        self._lock = threading.Lock()  # Guards workers and the published weights
+        self._chunks = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._threads = []
+        self._publish_weights(0)
+
+        self._listener = socket.create_server((host, port))
+        self.host, self.port = self._listener.getsockname()[:2]
+        self._accept_thread = threading.Thread(target=self._accept, name='parameter-server', daemon=True)
+        self._accept_thread.start()
+
+    def _publish_weights(self, version):
+        weights = {k: v.detach().cpu().numpy().copy() for k, v in self.agent.model.state_dict().items()}
+        with self._lock:
+            self.weights = weights
+            self.version = version
+
+    def _accept(self):
+        self._listener.settimeout(0.5)  # Wake up regularly to notice close()
+        while not self._stopping.is_set():
+            try:
+                conn, address = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            thread = threading.Thread(target=self._serve_worker, args=(conn, address), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve_worker(self, conn, address):
+        conn.settimeout(self.worker_timeout)  # A worker that stops talking is dropped
+        worker = None
+        try:
+            while True:
+                message, arrays = recv_message(conn)
+                kind = message['type']
+                if kind == 'register':
+                    worker = self._register(message, address)
+                    reply = {'type': 'registered', 'worker_id': worker.worker_id, 'chunk_episodes': self.chunk_episodes,
+                             'heartbeat_interval': self.heartbeat_interval, 'epsilon': self.agent.epsilon}
+                    send_message(conn, reply)
+                    continue
+                if worker is None:
+                    raise ValueError(f"Message {kind} before registration")
+                worker.last_seen = time.monotonic()
+                if self._stopping.is_set():
+                    send_message(conn, {'type': 'stop'})
+                    continue
+                if kind == 'transitions':
+                    self._receive_chunk(worker, message, arrays)
+                    send_message(conn, {'type': 'ack', 'epsilon': self.agent.epsilon, 'version': self.version})
+                elif kind == 'get_weights':
+                    with self._lock:
+                        weights, version = self.weights, self.version
+                    worker.weight_version = version
+                    if message['version'] == version:
+                        send_message(conn, {'type': 'ack', 'epsilon': self.agent.epsilon, 'version': version})
+                    else:
+                        send_message(conn, {'type': 'weights', 'version': version}, weights)
+                elif kind == 'heartbeat':
+                    send_message(conn, {'type': 'ack', 'epsilon': self.agent.epsilon, 'version': self.version})
+                elif kind == 'goodbye':
+                    break
+                else:
+                    raise ValueError(f"Unknown message type {kind}")
+        except (OSError, ValueError, KeyError):
+            pass  # Timed out, disconnected or malformed: drop the worker, the learner carries on
+        finally:
+            if worker is not None:
+                worker.connected = False
+            conn.close()
+
+    def _register(self, message, address):
+        with self._lock:
+            worker = WorkerStats(len(self.workers), message.get('name', ''), f"{address[0]}:{address[1]}")
+            self.workers[worker.worker_id] = worker
+        return worker
+
+    def _receive_chunk(self, worker, message, arrays):
+        worker.transition_bytes += sum(array.nbytes for array in arrays.values())
+        if self.max_staleness is not None and self.version - message['version'] > self.max_staleness:
+            worker.stale_chunks += 1
+            return
+        chunk = dict(message, **{key: arrays[key] for key in TRANSITION_KEYS})
+        # Backpressure: the worker waits for its ack while the learner is behind
+        while not self._stopping.is_set():
+            try:
+                self._chunks.put(chunk, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        worker.chunks += 1
+        worker.episodes += message['episodes']
+        worker.steps += len(chunk['actions'])
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            workers = list(self.workers.values())
+        return {worker.worker_id: worker.as_dict(now, self.worker_timeout) for worker in workers}
+
+    def train(self, episodes, batch_size=64, print_interval=1000, startup_timeout=None):
+        # Raises RuntimeError once every worker has been gone for worker_timeout seconds with the episode budget
+        # unmet, or if none registered within startup_timeout seconds (None waits for the first worker indefinitely)
+        agent = self.agent
+        episode_count = total_wins = total_losses = last_print = 0
+        start_time = last_connected = time.monotonic()
+        while episode_count < episodes:
+            block = len(agent.memory) <= batch_size
+            while True:
+                try:
+                    chunk = self._chunks.get(block=block, timeout=1.0 if block else None)
+                except queue.Empty:
+                    self._check_workers(start_time, last_connected, startup_timeout)
+                    break
+                agent.memory.add_batch(*(chunk[key] for key in TRANSITION_KEYS))
+                episode_count += chunk['episodes']
+                total_wins += chunk['wins']
+                total_losses += chunk['losses']
+                block = False
+
+            if len(agent.memory) > batch_size:
+                agent.replay(batch_size)
+                if agent.train_steps % self.weight_sync_interval == 0:
+                    self._publish_weights(self.version + 1)
+            with self._lock:
+                if any(worker.connected for worker in self.workers.values()):
+                    last_connected = time.monotonic()
+
+            if episode_count - last_print >= print_interval:
+                last_print = episode_count
+                elapsed = time.monotonic() - start_time
+                alive = sum(worker['alive'] for worker in self.stats().values())
+                print('--------------------------------------------------')
+                print(f"Episode: {episode_count}, Updates: {agent.train_steps}, Wins: {total_wins},"
+                      f" Losses: {total_losses}, winrate: {total_wins / max(total_wins + total_losses, 1):.2f},"
+                      f" epsilon: {agent.epsilon:.3f}, workers: {alive}, episodes/sec: {episode_count / elapsed:.0f},"
+                      f" updates/sec: {agent.train_steps / elapsed:.0f}")
+                print('--------------------------------------------------')
+        return agent
+
+    def _check_workers(self, start_time, last_connected, startup_timeout):
+        now = time.monotonic()
+        with self._lock:
+            registered = bool(self.workers)
+            connected = any(worker.connected for worker in self.workers.values())
+        if connected or not self._chunks.empty():
+            return
+        if registered and now - last_connected > self.worker_timeout:
+            raise RuntimeError(f"All workers disconnected for over {self.worker_timeout}s before the episode budget "
+                               f"was reached")
+        if not registered and startup_timeout is not None and now - start_time > startup_timeout:
+            raise RuntimeError(f"No worker registered within {startup_timeout}s")
+
+    def close(self, timeout=None):
+        # Tells workers to stop on their next message, then waits up to timeout for them to disconnect
+        self._stopping.set()
+        deadline = time.monotonic() + (self.worker_timeout if timeout is None else timeout)
+        for thread in list(self._threads):
+            thread.join(max(deadline - time.monotonic(), 0))
+        self._accept_thread.join()
+        self._listener.close()
+
+
+class WorkerConnection:
+    # Request/reply channel to the parameter server, shared by a worker's main and heartbeat threads
+    def __init__(self, host, port, timeout=60.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._lock = threading.Lock()
+
+    def call(self, message, arrays=None):
+        with self._lock:
+            send_message(self.sock, message, arrays)
+            return recv_message(self.sock)
+
+    def close(self):
+        try:
+            with self._lock:
+                send_message(self.sock, {'type': 'goodbye'})
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def run_worker(host, port, name=None, seed=None, weight_pull_interval=1.0):
+    """Rollout worker: plays episodes with the latest pulled policy and pushes them to the parameter server
+    until it is told to stop. Weights are pulled at most every ``weight_pull_interval`` seconds."""
+    torch.set_num_threads(1)
+    rng = np.random.default_rng(seed)
+    env = BlackjackEnv(bankroll_store=BankrollStore(), seed=rng.spawn(1)[0])
+    model = build_network(env.observation_space.shape[0], env.action_space.n)
+    connection = WorkerConnection(host, port)
+    config, _ = connection.call({'type': 'register', 'name': name or f"{socket.gethostname()}-{os.getpid()}"})
+    worker_id = config['worker_id']
+    epsilon = config['epsilon']
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(config['heartbeat_interval']):
+            try:
+                reply, _ = connection.call({'type': 'heartbeat', 'worker_id': worker_id})
+            except OSError:
+                break
+            if reply['type'] == 'stop':
+                stopped.set()
+
+    threading.Thread(target=heartbeat, name='heartbeat', daemon=True).start()
+    version = -1
+    last_pull = None
+    try:
+        while not stopped.is_set():
+            if last_pull is None or time.monotonic() - last_pull >= weight_pull_interval:
+                reply, weights = connection.call({'type': 'get_weights', 'worker_id': worker_id, 'version': version})
+                if reply['type'] == 'stop':
+                    break
+                if reply['type'] == 'weights':
+                    model.load_state_dict({k: torch.from_numpy(v.copy()) for k, v in weights.items()})
+                    version = reply['version']
+                last_pull = time.monotonic()
+
+            chunk = play_episodes(env, model, rng, epsilon, config['chunk_episodes'])
+            arrays = {key: chunk[key] for key in TRANSITION_KEYS}
+            message = {'type': 'transitions', 'worker_id': worker_id, 'version': version,
+                       'episodes': chunk['episodes'], 'wins': int(chunk['wins']), 'losses': int(chunk['losses'])}
+            reply, _ = connection.call(message, arrays)
+            if reply['type'] == 'stop':
+                break
+            epsilon = reply['epsilon']
+    except OSError:
+        pass  # Server gone
+    finally:
+        stopped.set()
+        connection.close()
+
+
+def train_local_cluster(episodes, num_workers=2, batch_size=64, print_interval=1000, seed=0, **server_options):
+    # Parameter server in this process plus num_workers rollout worker processes, all on localhost. The seed gives
+    # every process its own stream, but batch arrival order still varies from run to run
+    server_seed, *worker_seeds = np.random.SeedSequence(seed).spawn(num_workers + 1)
+    server = ParameterServer(seed=server_seed, **server_options)
+    ctx = mp.get_context('spawn')
+    workers = [ctx.Process(target=run_worker, args=(server.host, server.port, f"local-{i}", worker_seed), daemon=True)
+               for i, worker_seed in enumerate(worker_seeds)]
+    for worker in workers:
+        worker.start()
+    try:
+        agent = server.train(episodes, batch_size=batch_size, print_interval=print_interval, startup_timeout=60.0)
+    finally:
+        server.close()
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+    return agent, server.stats()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed DQN self-play over TCP")
+    subparsers = parser.add_subparsers(dest='role', required=True)
+    server_parser = subparsers.add_parser('server', help="run the parameter/learner server")
+    server_parser.add_argument('episodes', type=int)
+    server_parser.add_argument('--host', default='0.0.0.0')
+    server_parser.add_argument('--port', type=int, default=5555)
+    server_parser.add_argument('--model', help="weights to start from")
+    server_parser.add_argument('--chunk-episodes', type=int, default=20)
+    server_parser.add_argument('--worker-timeout', type=float, default=10.0)
+    server_parser.add_argument('--max-staleness', type=int, help="drop batches played with weights this many"
+                                                                 " versions old")
+    worker_parser = subparsers.add_parser('worker', help="run a rollout worker")
+    worker_parser.add_argument('host')
+    worker_parser.add_argument('--port', type=int, default=5555)
+    worker_parser.add_argument('--seed', type=int)
+    worker_parser.add_argument('--weight-pull-interval', type=float, default=1.0, help="seconds between weight pulls")
+    local_parser = subparsers.add_parser('local', help="server and worker processes on this machine")
+    local_parser.add_argument('episodes', type=int)
+    local_parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    if args.role == 'server':
+        server = ParameterServer(args.host, args.port, model_path=args.model, chunk_episodes=args.chunk_episodes,
+                                 worker_timeout=args.worker_timeout, max_staleness=args.max_staleness)
+        print(f"Parameter server listening on {server.host}:{server.port}")
+        agent = server.train(args.episodes)
+        server.close()
+        print(json.dumps(server.stats(), indent=2))
+        agent.save("final_model.pth")
+    elif args.role == 'worker':
+        run_worker(args.host, args.port, seed=args.seed, weight_pull_interval=args.weight_pull_interval)
+    else:
+        agent, stats = train_local_cluster(args.episodes, num_workers=args.workers)
+        print(json.dumps(stats, indent=2))
+        agent.save("final_model.pth")
@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+import numpy as np
+
+from dealer_odds import INFINITE_DECK_PROBS, finish_distribution
+
+# Q-table layout of other/q_learning.py: [player total, dealer upcard (Ace = 1), usable ace, action]
+Q_TABLE_SHAPE = (32, 11, 2, 3)
+STAND, HIT, DOUBLE = 0, 1, 2
+DEALER_FINAL_TOTALS = np.array([17, 18, 19, 20, 21, 22, 21])  # Per dealer_odds.OUTCOMES, bust as 22
+
+
+def q_table_index(game):
+    # Index of the current BlackjackEnv hand into a Q_TABLE_SHAPE table
+    hand = game.player.hand
+    upcard = game.get_hand_value([game.dealer.hand[0]])
+    return min(hand.value, 31), 1 if upcard == 11 else upcard, int(hand.soft)
+
+
+class BlackjackSolver:
+    """Exact action values of BlackjackEnv by backward induction over the player's hand.
+
+    A hand is (hard total, holds an ace); every hit strictly raises the hard total, so the values
+    follow from a memoized recursion. Cards are drawn with infinite-deck probabilities and rewards
+    are those of BlackjackEnv for a fixed opening ``bet`` and ``bankroll``.
+    """
+
+    def __init__(self, bet=10, bankroll=10000, gamma=1.0):
+        self.bet = bet
+        self.bankroll = bankroll
+        self.gamma = gamma
+
+    def solve(self):
+        Q = np.zeros(Q_TABLE_SHAPE)
+        for upcard in range(2, 12):
+            for has_ace in (True, False):  # Hard hands without an ace overwrite the rarer ones holding one
+                for hard_total in range(2, 22):
+                    value = self._hand_value(hard_total, has_ace)
+                    if hard_total < 4 and not has_ace:
+                        continue  # Two cards make at least 4
+                    soft = int(has_ace and hard_total + 10 <= 21)
+                    Q[value, 1 if upcard == 11 else upcard, soft] = self.q_values(hard_total, has_ace, upcard)
+        return Q
+
+    @lru_cache(maxsize=None)
+    def q_values(self, hard_total, has_ace, upcard):
+        value = self._hand_value(hard_total, has_ace)
+
+        stand = self._settlement(value, upcard, self.bet)
+
+        hit = 0.0
+        for i, p in enumerate(INFINITE_DECK_PROBS):
+            next_value = self._hand_value(hard_total + i + 1, has_ace or i == 0)
+            if next_value > 21:
+                hit += p * self._settlement(next_value, upcard, self.bet)
+            else:
+                reward = self._hit_reward(next_value) + (0.5 if has_ace and next_value < 15 else 0.0)
+                hit += p * (reward + self.gamma * max(self.q_values(hard_total + i + 1, has_ace or i == 0, upcard)))
+
+        # Player.can_double_down counts aces as 11, so no hand holding an ace can double
+        if not has_ace and 9 <= hard_total <= 11:
+            double = sum(p * self._settlement(self._hand_value(hard_total + i + 1, i == 0), upcard, 2 * self.bet)
+                         for i, p in enumerate(INFINITE_DECK_PROBS))
+        else:
+            double = self.gamma * max(stand, hit)  # Refused doubles leave the hand unchanged
+        return stand, hit, double
+
+    @lru_cache(maxsize=None)
+    def _settlement(self, player_value, upcard, bet):
+        # Expected BlackjackEnv._end_round reward once the player stops on player_value
+        win_reward = 5 + min(bet * 0.05, 10)
+        if player_value > 21:
+            dealer_penalty = 2.0
+        elif 17 <= player_value:
+            dealer_penalty = 0.5
+        elif 3 <= player_value < 11:
+            dealer_penalty = min(self.bankroll * 0.05, 5)
+        else:
+            dealer_penalty = 2.0
+        lose_reward = -dealer_penalty - min(bet * 0.05, 5)
+        if player_value > 21:
+            return lose_reward
+
+        win = push = lose = 0.0
+        for i, p in enumerate(INFINITE_DECK_PROBS):
+            hard_total = (1 if upcard == 11 else upcard) + i + 1
+            has_ace = upcard == 11 or i == 0
+            dealer_value = self._hand_value(hard_total, has_ace)
+            if dealer_value > player_value:
+                lose += p  # BlackjackEnv only lets the dealer draw when not already ahead
+                continue
+            dist = finish_distribution(hard_total, has_ace, 2)
+            win += p * dist[(DEALER_FINAL_TOTALS > 21) | (DEALER_FINAL_TOTALS < player_value)].sum()
+            push += p * dist[DEALER_FINAL_TOTALS == player_value].sum()
+            lose += p * dist[(DEALER_FINAL_TOTALS <= 21) & (DEALER_FINAL_TOTALS > player_value)].sum()
+        return win * win_reward + push * 0.5 + lose * lose_reward
+
+    @staticmethod
+    def _hit_reward(player_value):
+        # Same shaping as BlackjackEnv._hit_reward for a hand that did not bust
+        reward = 0
+        if player_value <= 13:
+            reward += 1.0
+        elif player_value <= 16:
+            reward += 0.3
+        elif player_value == 21:
+            reward += 2.0
+        if 11 < player_value <= 20:
+            reward += 0.2
+        if player_value >= 18:
+            reward -= 1
+        return reward
+
+    @staticmethod
+    def _hand_value(hard_total, has_ace):
+        return hard_total + 10 if has_ace and hard_total + 10 <= 21 else hard_total
+
+
+if __name__ == "__main__":
+    Q = BlackjackSolver().solve()
+    np.save("q_table.npy", Q)
+    print("Optimal Q-table saved to q_table.npy")
@@ -2,68 +2,138 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from collections import deque
-import random
 from blackjack_env import BlackjackEnv
+from replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
+
+
+def build_network(state_size, action_size, hidden_size=128):
+    return nn.Sequential(
+        nn.Linear(state_size, hidden_size),
+        nn.ReLU(),
+        nn.Linear(hidden_size, hidden_size),
+        nn.ReLU(),
+        nn.Linear(hidden_size, action_size)
+    )
 
 
 class DQNAgent:
-    def __init__(self, env):
+    def __init__(self, env, optimizer=optim.Adam, target_update_interval=10, memory_size=50000, memory=None,
+                 seed=None, gamma=0.99, epsilon_decay=0.995, epsilon_min=0.01, learning_rate=0.0005, hidden_size=128,
+                 prioritized_replay=False):
         self.env = env
-        self.memory = deque(maxlen=50000)
-        self.gamma = 0.99
+        # seed may be an int, a SeedSequence or a Generator; exploration, weight init and replay sampling
+        # each draw from their own child stream, never from the global random modules
+        self.rng, init_rng, memory_rng = np.random.default_rng(seed).spawn(3)
+        self.init_seed = int(init_rng.integers(2 ** 63))
+        self.gamma = gamma
         self.epsilon = 1.0
-        self.epsilon_min = 0.01
-        self.epsilon_decay = 0.995
-        self.learning_rate = 0.0005
+        self.epsilon_min = epsilon_min
+        self.epsilon_decay = epsilon_decay  # Applied after every replay update
+        self.learning_rate = learning_rate
+        self.hidden_size = hidden_size
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = self._build_model()
         self.target_model = self._build_model()
         self.update_target_model()
+        # Any ReplayBuffer works as memory, e.g. a replay_buffer.MemmapReplayBuffer for on-disk experience
+        # prioritized_replay=True replays transitions by TD error from a replay_buffer.PrioritizedReplayBuffer
+        if memory is None:
+            buffer_type = PrioritizedReplayBuffer if prioritized_replay else ReplayBuffer
+            memory = buffer_type(memory_size, env.observation_space.shape[0], device=self.device, seed=memory_rng)
+        self.memory = memory
+        self.optimizer = optimizer(self.model.parameters(), lr=self.learning_rate)
+        self.loss_fn = nn.MSELoss()
+        self.target_update_interval = target_update_interval  # Replay updates between target network syncs
+        self.train_steps = 0
+
+        # Inference path: act() copies the state into a preallocated (pinned when on GPU) host tensor
+        state_size = env.observation_space.shape[0]
+        self._host_input = torch.zeros((1, state_size), pin_memory=self.device.type == 'cuda')
+        self._host_view = self._host_input.numpy()
+        self._input = self._host_input if self.device.type == 'cpu' else torch.zeros((1, state_size),
+                                                                                     device=self.device)
+        self.policy_model = self.model  # Replaced by a traced or compiled model in compile_inference()
 
     def _build_model(self):
-        model = nn.Sequential(
-            nn.Linear(self.env.observation_space.shape[0], 128),
-            nn.ReLU(),
-            nn.Linear(128, 128),
-            nn.ReLU(),
-            nn.Linear(128, self.env.action_space.n)
-        )
-        return model.cuda()
+        # Initialized from the agent's seed without touching torch's global RNG state
+        with torch.random.fork_rng(devices=[]):
+            torch.manual_seed(self.init_seed)
+            model = build_network(self.env.observation_space.shape[0], self.env.action_space.n, self.hidden_size)
+        return model.to(self.device)
 
     def update_target_model(self):
         self.target_model.load_state_dict(self.model.state_dict())
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def compile_inference(self, mode='jit'):
+        # 'jit' traces the network with torch.jit, 'compile' uses torch.compile; both share the weights
+        # with self.model, so training and load() keep updating the policy used by act()
+        if mode == 'jit':
+            with torch.no_grad():
+                self.policy_model = torch.jit.trace(self.model, self._input)
+        elif mode == 'compile':
+            self.policy_model = torch.compile(self.model)
+        elif mode is None:
+            self.policy_model = self.model
+        else:
+            raise ValueError(f"Unknown inference mode: {mode}")
 
     def act(self, state):
-        state = torch.FloatTensor(state).cuda().unsqueeze(0)
-        if np.random.rand() <= self.epsilon:
-            return random.randrange(self.env.action_space.n)
-        act_values = self.model(state)
-        return torch.argmax(act_values[0]).item()
+        if self.rng.random() <= self.epsilon:
+            return int(self.rng.integers(self.env.action_space.n))
+        self._host_view[0] = state
+        with torch.inference_mode():
+            if self._input is not self._host_input:
+                self._input.copy_(self._host_input, non_blocking=True)
+            return int(self.policy_model(self._input).argmax(1).item())
+
+    def act_batch(self, states):
+        # Epsilon-greedy actions for a batch of states (one per table) from a single forward pass
+        states = np.asarray(states, dtype=np.float32)
+        explore = self.rng.random(len(states)) <= self.epsilon
+        actions = self.rng.integers(self.env.action_space.n, size=len(states))
+        if not explore.all():
+            with torch.inference_mode():
+                q_values = self.policy_model(torch.from_numpy(states).to(self.device, non_blocking=True))
+                greedy = q_values.argmax(1).cpu().numpy()
+            actions = np.where(explore, actions, greedy)
+        return actions
 
     def replay(self, batch_size):
-        minibatch = random.sample(self.memory, batch_size)
-        for state, action, reward, next_state, done in minibatch:
-            state = torch.FloatTensor(state).cuda().unsqueeze(0)
-            next_state = torch.FloatTensor(next_state).cuda().unsqueeze(0)
-            target = reward
-            if not done:
-                target = (reward + self.gamma * torch.max(self.target_model(next_state)[0]).item())
-            target_f = self.model(state).clone()
-            target_f[0][action] = target
-            self.model.zero_grad()
-            loss = nn.MSELoss()(self.model(state)[0], target_f[0])
-            loss.backward()
-            for param in self.model.parameters():
-                param.data -= self.learning_rate * param.grad.data
+        if self.memory.prioritized:
+            *batch, indices = self.memory.sample(batch_size)
+            self.memory.update_priorities(indices, self.learn(*batch).cpu().numpy())
+        else:
+            self.learn(*self.memory.sample(batch_size))
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
-        self.update_target_model()
+
+    def learn(self, states, actions, rewards, next_states, dones, weights=None):
+        # One gradient step on a minibatch of tensors, from the replay memory or an offline loader; weights
+        # scale each sample's squared error. Returns the absolute TD errors
+        # TD targets for the whole minibatch from a single target network pass
+        with torch.no_grad():
+            next_q_values = self.target_model(next_states).max(1)[0]
+        targets = rewards + self.gamma * next_q_values * (1 - dones)
+
+        q_values = self.model(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        if weights is None:
+            loss = self.loss_fn(q_values, targets)
+        else:
+            loss = (weights * (q_values - targets) ** 2).mean()
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+        self.train_steps += 1
+        if self.train_steps % self.target_update_interval == 0:
+            self.update_target_model()
+        return (targets - q_values).detach().abs()
 
     def load(self, name):
-        self.model.load_state_dict(torch.load(name))
+        self.model.load_state_dict(torch.load(name, map_location=self.device))
 
     def save(self, name):
         torch.save(self.model.state_dict(), name)
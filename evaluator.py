@@ -0,0 +1,231 @@
+import argparse
+import math
+import multiprocessing as mp
+import queue
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from game_logic import RANK_VALUES
+from vec_blackjack_env import DEALER_WIN, PLAYER_WIN, PUSH, VecBlackjackEnv
+
+# Running sums kept per evaluation; workers send them to the coordinator as one array
+STAT_FIELDS = ('hands', 'return_sum', 'return_sq', 'wins', 'pushes', 'losses', 'reward_sum', 'reward_sq', 'truncated')
+
+
+class QTablePolicy:
+    # Greedy policy of a Q_TABLE_SHAPE table (see dp_solver.q_table_index), read off the env's hands
+    def __init__(self, q_table):
+        self.actions = np.asarray(q_table).argmax(axis=-1)
+
+    def __call__(self, states, env):
+        soft = (env.player_aces > 0) & (env.player_hard + 10 <= 21)
+        value = np.minimum(np.where(soft, env.player_hard + 10, env.player_hard), 31)
+        upcard = RANK_VALUES[env.dealer_upcard]
+        return self.actions[value, np.where(upcard == 11, 1, upcard), soft.astype(np.intp)]
+
+
+class BatchPolicy:
+    # Any object with act_batch(states): NumpyPolicy, policy_table.TableAgent or a DQNAgent
+    def __init__(self, agent):
+        self.agent = agent
+
+    def __call__(self, states, env):
+        return self.agent.act_batch(states)
+
+
+def as_policy(policy):
+    if isinstance(policy, np.ndarray):
+        return QTablePolicy(policy)
+    if hasattr(policy, 'act_batch'):
+        return BatchPolicy(policy)
+    return policy  # Already a callable of (states, env)
+
+
+def load_policy(path):
+    # Q-table (.npy), compiled PolicyTable or exported weights (.npz), or torch weights (.pth)
+    from numpy_policy import NumpyPolicy
+
+    if path.endswith('.npy'):
+        return np.load(path)
+    if path.endswith('.pth'):
+        return NumpyPolicy.from_torch(path)
+    with np.load(path) as data:
+        is_table = 'q_values' in data.files
+    if is_table:
+        from policy_table import PolicyTable, TableAgent
+        return TableAgent(PolicyTable.load(path))
+    return NumpyPolicy.load(path)
+
+
+class _TablePlayer:
+    """Plays a policy on a VecBlackjackEnv, accumulating per-hand results into STAT_FIELDS sums.
+
+    A hand's return is its bankroll change divided by its opening bet. No hand takes more than 11 hits,
+    so one still open after ``max_steps`` decisions is repeating a refused double (which leaves the
+    hand unchanged) and is made to stand; such hands are counted as truncated.
+    """
+
+    def __init__(self, policy, num_tables, seed, initial_money, max_steps):
+        self.policy = as_policy(policy)
+        self.env = VecBlackjackEnv(num_envs=num_tables, initial_money=initial_money, seed=seed)
+        self.max_steps = max_steps
+        self.states = self.env.reset()
+        self.opening_bet = self.env.current_bet.copy()
+        self.hand_reward = np.zeros(num_tables)
+        self.hand_steps = np.zeros(num_tables, dtype=np.int64)
+
+    def play(self, steps):
+        totals = np.zeros(len(STAT_FIELDS))
+        for _ in range(steps):
+            actions = np.asarray(self.policy(self.states, self.env))
+            stuck = self.hand_steps >= self.max_steps
+            if stuck.any():
+                actions = np.where(stuck, 0, actions)
+            self.states, rewards, done, infos = self.env.step(actions)
+            self.hand_reward += rewards
+            self.hand_steps += 1
+            if not done.any():
+                continue
+            returns = infos['net_winnings'][done] / self.opening_bet[done]
+            outcomes = infos['win_loss'][done]
+            hand_rewards = self.hand_reward[done]
+            totals += (done.sum(), returns.sum(), (returns ** 2).sum(), (outcomes == PLAYER_WIN).sum(),
+                       (outcomes == PUSH).sum(), (outcomes == DEALER_WIN).sum(), hand_rewards.sum(),
+                       (hand_rewards ** 2).sum(), stuck[done].sum())
+            self.hand_reward[done] = 0
+            self.hand_steps[done] = 0
+            self.opening_bet[done] = self.env.current_bet[done]
+        return totals
+
+
+def summarize(totals, elapsed=0.0, confidence=0.95):
+    stats = dict(zip(STAT_FIELDS, totals))
+    n = max(stats['hands'], 1)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def mean_and_se(total, squares):
+        mean = total / n
+        variance = max(squares / n - mean ** 2, 0.0) * n / max(n - 1, 1)
+        return mean, math.sqrt(variance / n)
+
+    def estimate(mean, se):
+        return {'mean': mean, 'se': se, 'ci': (mean - z * se, mean + z * se)}
+
+    mean_return, return_se = mean_and_se(stats['return_sum'], stats['return_sq'])
+    report = {
+        'hands': int(stats['hands']),
+        'house_edge': estimate(-mean_return, return_se),
+        'reward': estimate(*mean_and_se(stats['reward_sum'], stats['reward_sq'])),
+        'truncated_hands': int(stats['truncated']),
+        'elapsed': elapsed,
+        'hands_per_sec': stats['hands'] / elapsed if elapsed else 0.0,
+        'confidence': confidence,
+    }
+    for name, field in (('win_rate', 'wins'), ('push_rate', 'pushes'), ('loss_rate', 'losses')):
+        p = stats[field] / n
+        report[name] = estimate(p, math.sqrt(p * (1 - p) / n))
+    return report
+
+
+def _finished(totals, target_se, min_hands, max_hands):
+    hands = totals[0]
+    if hands >= max_hands:
+        return True
+    return hands >= min_hands and summarize(totals)['house_edge']['se'] <= target_se
+
+
+def _run_worker(worker_index, policy, num_tables, seed, initial_money, max_steps, steps_per_report, results, stop):
+    player = _TablePlayer(policy, num_tables, seed, initial_money, max_steps)
+    while not stop.is_set():
+        results.put((worker_index, player.play(steps_per_report)))
+
+
+def evaluate(policy, num_tables=4096, num_processes=1, target_se=0.005, min_hands=10000, max_hands=10_000_000,
+             steps_per_report=20, initial_money=10000, max_steps=20, confidence=0.95, seed=0):
+    """Monte Carlo evaluation of a policy on batches of VecBlackjackEnv tables.
+
+    ``policy`` is a Q-table array, an object with ``act_batch(states)`` or a callable of (states, env).
+    Play continues in rounds of ``steps_per_report`` steps until the house edge standard error drops to
+    ``target_se`` (after at least ``min_hands`` hands) or ``max_hands`` hands have been played. With
+    ``num_processes`` > 1, each process runs its own ``num_tables`` tables; the policy must then be picklable.
+    Reports are merged round by round in worker order, so a given seed gives the same result every run.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(num_processes)
+    totals = np.zeros(len(STAT_FIELDS))
+    start = time.perf_counter()
+    if num_processes == 1:
+        player = _TablePlayer(policy, num_tables, seeds[0], initial_money, max_steps)
+        while not _finished(totals, target_se, min_hands, max_hands):
+            totals += player.play(steps_per_report)
+        return summarize(totals, time.perf_counter() - start, confidence)
+
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    stop = ctx.Event()
+    workers = [ctx.Process(target=_run_worker, daemon=True,
+                           args=(i, policy, num_tables, worker_seed, initial_money, max_steps, steps_per_report,
+                                 results, stop))
+               for i, worker_seed in enumerate(seeds)]
+    for worker in workers:
+        worker.start()
+    pending = [[] for _ in workers]  # Reports received ahead of the round being merged
+    try:
+        while not _finished(totals, target_se, min_hands, max_hands):
+            while not all(pending):
+                try:
+                    worker_index, report = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not all(worker.is_alive() for worker in workers):
+                        raise RuntimeError("An evaluation worker exited")
+                    continue
+                pending[worker_index].append(report)
+            for reports in pending:
+                totals += reports.pop(0)
+    finally:
+        stop.set()
+        # Drain the queue so workers blocked on it can exit
+        while any(worker.is_alive() for worker in workers):
+            try:
+                while True:
+                    results.get_nowait()
+            except queue.Empty:
+                pass
+            for worker in workers:
+                worker.join(timeout=0.1)
+    return summarize(totals, time.perf_counter() - start, confidence)
+
+
+def format_report(report):
+    def line(name, estimate, scale=1.0, unit=''):
+        low, high = estimate['ci']
+        return (f"{name:12s} {estimate['mean'] * scale:9.4f}{unit}  "
+                f"[{low * scale:.4f}{unit}, {high * scale:.4f}{unit}]")
+
+    lines = [
+        f"Hands: {report['hands']} in {report['elapsed']:.1f}s ({report['hands_per_sec']:.0f} hands/sec),"
+        f" {report['confidence']:.0%} confidence intervals",
+        line('House edge', report['house_edge'], 100, '%'),
+        line('Win rate', report['win_rate'], 100, '%'),
+        line('Push rate', report['push_rate'], 100, '%'),
+        line('Loss rate', report['loss_rate'], 100, '%'),
+        line('Reward', report['reward']),
+    ]
+    if report['truncated_hands']:
+        lines.append(f"Truncated hands: {report['truncated_hands']}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of a blackjack policy")
+    parser.add_argument('policy', help="q_table.npy, policy_table.npz, an exported .npz or final_model.pth")
+    parser.add_argument('--tables', type=int, default=4096, help="tables played in parallel per process")
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--target-se', type=float, default=0.005, help="house edge standard error to stop at")
+    parser.add_argument('--max-hands', type=int, default=10_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    report = evaluate(load_policy(args.policy), num_tables=args.tables, num_processes=args.processes,
+                      target_se=args.target_se, max_hands=args.max_hands, seed=args.seed)
+    print(format_report(report))
@@ -1,11 +1,25 @@
-import random
-import json
+import numpy as np
+from bankroll_store import default_store
+
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+VALUES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+ACE = 12  # Rank index of 'A' in VALUES
+
+# Cards are encoded as suit * 13 + rank, where rank indexes VALUES
+RANK_VALUES = np.array([2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11], dtype=np.uint8)
+CARD_VALUES = tuple(np.tile(RANK_VALUES, len(SUITS)).tolist())  # Plain ints for per-card lookups
+HARD_CARD_VALUES = tuple(1 if value == 11 else value for value in CARD_VALUES)  # Aces counted as 1
+
 
 class Card:
     def __init__(self, suit, value):
         self.suit = suit
         self.value = value
 
+    @classmethod
+    def from_code(cls, code):
+        return cls(SUITS[code // 13], VALUES[code % 13])
+
     def __str__(self):
         return f"{self.value} of {self.suit}"
 
@@ -16,29 +30,106 @@ class Card:
             return 11
         return int(self.value)
 
+
 class Deck:
-    def __init__(self, num_decks=1):
+    def __init__(self, num_decks=1, rng=None, shuffles_per_batch=16):
         self.num_decks = num_decks
-        self.cards = []
+        self.rng = np.random.default_rng(rng)  # A seed or a numpy Generator, owned by this deck only
+        self.shuffles_per_batch = shuffles_per_batch
+        self._shuffles = np.empty((0, 52 * num_decks), dtype=np.uint8)
+        self.cards = np.empty(0, dtype=np.uint8)
+        self.position = 0  # Index of the next card to draw
         self.build_deck()
 
     def build_deck(self):
-        suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-        values = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.cards = [Card(suit, value) for suit in suits for value in values] * self.num_decks
-        random.shuffle(self.cards)
+        # Shoe orders are generated shuffles_per_batch at a time as rows of one permuted array
+        if len(self._shuffles) == 0:
+            shoe = np.tile(np.arange(52, dtype=np.uint8), self.num_decks)
+            self._shuffles = self.rng.permuted(np.tile(shoe, (self.shuffles_per_batch, 1)), axis=1)
+        self.cards, self._shuffles = self._shuffles[0], self._shuffles[1:]
+        self.position = 0
 
     def draw_card(self):
-        if len(self.cards) == 0:
+        if self.position == len(self.cards):
             self.build_deck()
-        return self.cards.pop()
+        card = self.cards.item(self.position)
+        self.position += 1
+        return card
+
+class Hand(list):
+    # Keeps the hard total (aces as 1) and the ace count up to date as cards are added or removed
+    def __init__(self, cards=()):
+        super().__init__()
+        self.hard_total = 0
+        self.aces = 0
+        for card in cards:
+            self.append(card)
+
+    def append(self, card):
+        super().append(card)
+        self.hard_total += HARD_CARD_VALUES[card]
+        self.aces += card % 13 == ACE
+
+    def pop(self, index=-1):
+        card = super().pop(index)
+        self.hard_total -= HARD_CARD_VALUES[card]
+        self.aces -= card % 13 == ACE
+        return card
+
+    def _recount(self):
+        self.hard_total = sum(HARD_CARD_VALUES[card] for card in self)
+        self.aces = sum(card % 13 == ACE for card in self)
+
+    # The remaining list mutators are rare, so they recount the whole hand
+    def extend(self, cards):
+        super().extend(cards)
+        self._recount()
+
+    def insert(self, index, card):
+        super().insert(index, card)
+        self._recount()
+
+    def remove(self, card):
+        super().remove(card)
+        self._recount()
+
+    def clear(self):
+        super().clear()
+        self._recount()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._recount()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recount()
+
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._recount()
+        return self
+
+    @property
+    def soft(self):
+        # One ace can count as 11 without busting
+        return self.aces > 0 and self.hard_total + 10 <= 21
+
+    @property
+    def value(self):
+        return self.hard_total + 10 if self.soft else self.hard_total
+
 
 class Player:
     def __init__(self, name, money):
         self.name = name
         self.money = money
-        self.hand = []
-        self.split_hand = []
+        self.hand = Hand()
+        self.split_hand = Hand()
         self.current_bet = 0
         self.split_bet = 0
         self.doubled_down = False
@@ -50,8 +141,8 @@ class Player:
             self.hand.append(card)
 
     def clear_hand(self):
-        self.hand = []
-        self.split_hand = []
+        self.hand = Hand()
+        self.split_hand = Hand()
         self.doubled_down = False
 
     def place_bet(self, amount):
@@ -63,11 +154,10 @@ class Player:
         self.money -= self.split_bet
 
     def can_split(self):
-        return len(self.hand) == 2 and self.hand[0].value == self.hand[1].value
+        return len(self.hand) == 2 and self.hand[0] % 13 == self.hand[1] % 13
 
     def can_double_down(self):
-        total = sum(card.get_value() for card in self.hand)
-        return total in [9, 10, 11]
+        return self.hand.hard_total + 10 * self.hand.aces in [9, 10, 11]  # Every ace counted as 11
 
     def double_down(self):
         if self.can_double_down():
@@ -81,23 +171,17 @@ class Player:
         self.money += amount
 
 class Game:
-    def __init__(self, num_decks=1):
-        self.deck = Deck(num_decks)
+    def __init__(self, num_decks=1, bankroll_store=None, rng=None):
+        self.deck = Deck(num_decks, rng=rng)
+        self.bankroll_store = bankroll_store if bankroll_store is not None else default_store()
         self.player = Player("Player", self.load_player_money())
         self.dealer = Player("Dealer", 0)
 
     def load_player_money(self):
-        try:
-            with open('player_data.json', 'r') as file:
-                data = json.load(file)
-            return data.get('player_money', 10000)
-        except FileNotFoundError:
-            return 10000
+        return self.bankroll_store.load('player_money', 10000)
 
     def save_player_money(self):
-        with open('player_data.json', 'w') as file:
-            data = {'player_money': self.player.money}
-            json.dump(data, file)
+        self.bankroll_store.save('player_money', self.player.money)
 
     def start_round(self):
         self.player.clear_hand()
@@ -134,8 +218,10 @@ class Game:
             self.dealer.receive_card(self.deck.draw_card())
 
     def get_hand_value(self, hand):
-        value = sum(card.get_value() for card in hand)
-        aces = sum(1 for card in hand if card.value == 'A')
+        if isinstance(hand, Hand):
+            return hand.value
+        value = sum(CARD_VALUES[card] for card in hand)
+        aces = sum(1 for card in hand if card % 13 == ACE)
         while value > 21 and aces:
             value -= 10
             aces -= 1
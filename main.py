@@ -1,65 +1,99 @@
+import os
+
+import numpy as np
+
+from actor_learner import train_actor_learner
+from checkpoint import CheckpointWriter, load_checkpoint
 from dqn_agent import DQNAgent
 from blackjack_env import BlackjackEnv
+from game_logic import Card
+from metrics import TrainingMetrics
+from profiling import NullProfiler
 from utils import plot_stats
 
-def train_dqn(episodes, model_path=None):
-    env = BlackjackEnv()
-    agent = DQNAgent(env)
-    batch_size = 64
-    rewards = []
-    cumulative_rewards = []
-    total_reward = 0
-    balances = []
-    total_wins = 0
-    total_losses = 0
-    player_values = []
-    dealer_values = []
-    actions_taken = []
-    bet_amounts = []
+def train_dqn(episodes, model_path=None, num_actors=0, plot_path=None, profiler=None, checkpoint_path=None,
+              checkpoint_interval=100, seed=None, batch_size=64, agent_options=None, bankroll_store=None):
+    if num_actors:
+        # Actor/learner mode: experience comes from num_actors worker processes. Batches arrive in timing-dependent
+        # order, so unlike the single-process loop a seeded run here is not bit-for-bit reproducible
+        unsupported = {'plot_path': plot_path, 'profiler': profiler, 'checkpoint_path': checkpoint_path,
+                       'agent_options': agent_options, 'bankroll_store': bankroll_store}
+        given = [name for name, value in unsupported.items() if value is not None]
+        if given:
+            raise ValueError(f"{', '.join(given)} cannot be combined with num_actors")
+        return train_actor_learner(episodes, model_path, num_actors=num_actors, batch_size=batch_size, seed=seed)
+
+    # Independent streams for the cards and the agent; a fixed seed makes the run reproducible
+    env_rng, agent_rng = np.random.default_rng(seed).spawn(2)
+    env = BlackjackEnv(bankroll_store=bankroll_store, seed=env_rng)  # Default: the shared player_data.json store
+    agent = DQNAgent(env, seed=agent_rng, **(agent_options or {}))  # e.g. gamma, learning_rate, hidden_size
+    metrics = TrainingMetrics(env.action_space.n)
+    profiler = profiler or NullProfiler()  # Pass a profiling.PhaseProfiler to time each phase
 
-    if model_path:
+    start_episode = 0
+    last_saved = None  # Episode covered by the checkpoint file
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        # Resume the full training state rather than just the weights
+        last_saved = load_checkpoint(agent, checkpoint_path)
+        start_episode = last_saved + 1
+        print(f"Resumed from {checkpoint_path} at episode {start_episode}, epsilon {agent.epsilon:.3f}")
+    elif model_path:
         agent.load(model_path)
+    checkpoints = CheckpointWriter(checkpoint_path) if checkpoint_path else None
 
-    for e in range(episodes):
-        state = env.reset()
-        episode_reward = 0
-        for time in range(500):  # Limit each episode to 500 steps
-            action = agent.act(state)
-            next_state, reward, done, info = env.step(action)
-            episode_reward += reward
-            agent.remember(state, action, reward, next_state, done)
-            state = next_state
-            player_values.append(info.get('player_value', 0))
-            dealer_values.append(info.get('dealer_value', 0))
-            actions_taken.append(action)
-            bet_amounts.append(info.get('bet_amount', 0))
-            if done:
-                break
-        total_reward += episode_reward
-        rewards.append(episode_reward / (time + 1))
-        cumulative_rewards.append(total_reward)
-        balances.append(env.game.player.money)
+    try:
+        for e in range(start_episode, episodes):
+            profiler.episode_start(e)
+            with profiler.phase('reset'):
+                state = env.reset()
+            episode_reward = 0
+            for time in range(500):  # Limit each episode to 500 steps
+                with profiler.phase('act'):
+                    action = agent.act(state)
+                with profiler.phase('step'):
+                    next_state, reward, done, info = env.step(action)
+                episode_reward += reward
+                with profiler.phase('remember'):
+                    agent.remember(state, action, reward, next_state, done)
+                state = next_state
+                metrics.record_step(action, info)
+                if done:
+                    break
+            metrics.record_episode(episode_reward, time + 1, env.game.player.money, info.get('win_loss'))
+            profiler.count('steps', time + 1)
 
-        if 'win_loss' in info:
-            if info['win_loss'] == 'player':
-                total_wins += 1
-            elif info['win_loss'] == 'dealer':
-                total_losses += 1
+            if len(agent.memory) > batch_size:
+                with profiler.phase('replay'):
+                    agent.replay(batch_size)
+            profiler.episode_end(e)
 
-        if len(agent.memory) > batch_size:
-            agent.replay(batch_size)
+            if checkpoints and (e + 1) % checkpoint_interval == 0:
+                with profiler.phase('checkpoint'):
+                    checkpoints.save(agent, e)
+                last_saved = e
 
-        if e % 100 == 0 and e > 0:
-            print('--------------------------------------------------')
-            print(f"Episode: {e}, Reward: {rewards[-1]:.2f}, Balance: {balances[-1]:.2f}, Wins: {total_wins},"
-                  f" Losses: {total_losses}, winrate: {total_wins / (total_wins + total_losses):.2f}, bet_amount: {bet_amounts[-1]},"
-                  f" , player_value: {player_values[-1]}, dealer_value: {dealer_values[-1]}")
-            print(f"Player Cards: {[card.__str__() for card in env.game.player.hand]}")
-            print(f"Dealer Upcard:{[card.__str__() for card in env.game.dealer.hand]}")
-            print('--------------------------------------------------')
+            if e % 100 == 0 and e > 0:
+                with profiler.phase('report'):
+                    print('--------------------------------------------------')
+                    print(f"Episode: {e}, Reward: {metrics.rewards.last:.2f}, Balance: {metrics.balances.last:.2f}, Wins: {metrics.total_wins},"
+                          f" Losses: {metrics.total_losses}, winrate: {metrics.win_rate:.2f}, bet_amount: {metrics.bet_amounts.last},"
+                          f" , player_value: {metrics.player_values.last}, dealer_value: {metrics.dealer_values.last}")
+                    print(f"Mean reward (last 100): {metrics.reward_window.mean:.2f}, winrate (last 100): {metrics.win_window.mean:.2f},"
+                          f" actions: {metrics.action_counts.tolist()}")
+                    print(f"Player Cards: {[str(Card.from_code(card)) for card in env.game.player.hand]}")
+                    print(f"Dealer Upcard:{[str(Card.from_code(card)) for card in env.game.dealer.hand]}")
+                    if profiler.enabled:
+                        print(profiler.report())
+                    print('--------------------------------------------------')
 
+        if checkpoints and last_saved != episodes - 1:
+            checkpoints.save(agent, episodes - 1)
+    finally:
+        if checkpoints:
+            checkpoints.close()  # Waits for the last write, so no partial file is left behind
+        profiler.close()  # Writes a sampling window still open when training stops
     agent.save("final_model.pth")
-    plot_stats(rewards, cumulative_rewards, balances, total_wins, total_losses, player_values, dealer_values, actions_taken, bet_amounts, episodes, env)
+    plot_stats(metrics, plot_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+from collections import deque
+
+import numpy as np
+
+
+class WindowedMean:
+    # Mean of the last `window` values, kept as a running sum
+    def __init__(self, window=100):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def add(self, value):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else 0.0
+
+
+class DownsampledSeries:
+    """Series of at most ``max_points`` bucket means covering every value added so far.
+
+    When the buffer fills up, neighbouring buckets are merged and the bucket width doubles,
+    so memory stays fixed however long the run is.
+    """
+
+    def __init__(self, max_points=1000):
+        self.max_points = max_points - max_points % 2
+        self.bucket_size = 1
+        self.means = []
+        self.count = 0  # Values added so far
+        self.last = 0.0
+        self._sum = 0.0
+        self._pending = 0
+
+    def add(self, value):
+        self.last = value
+        self.count += 1
+        self._sum += value
+        self._pending += 1
+        if self._pending == self.bucket_size:
+            self.means.append(self._sum / self.bucket_size)
+            self._sum = 0.0
+            self._pending = 0
+            if len(self.means) == self.max_points:
+                pairs = np.asarray(self.means).reshape(-1, 2)
+                self.means = pairs.mean(axis=1).tolist()
+                self.bucket_size *= 2
+
+    def points(self):
+        # (x, y) arrays, x being the index of each bucket's centre
+        means = self.means + ([self._sum / self._pending] if self._pending else [])
+        x = np.arange(len(means)) * self.bucket_size + (self.bucket_size - 1) / 2
+        if self._pending:
+            x[-1] = len(self.means) * self.bucket_size + (self._pending - 1) / 2
+        return x, np.asarray(means)
+
+
+class TrainingMetrics:
+    """Fixed-memory statistics of a train_dqn run, fed once per step and once per episode."""
+
+    def __init__(self, num_actions=3, window=100, max_points=1000):
+        self.episodes = 0
+        self.steps = 0
+        self.total_reward = 0.0
+        self.total_wins = 0
+        self.total_losses = 0
+        self.action_counts = np.zeros(num_actions, dtype=np.int64)
+
+        self.reward_window = WindowedMean(window)
+        self.win_window = WindowedMean(window)
+
+        self.rewards = DownsampledSeries(max_points)
+        self.cumulative_rewards = DownsampledSeries(max_points)
+        self.balances = DownsampledSeries(max_points)
+        self.bet_amounts = DownsampledSeries(max_points)
+        self.player_values = DownsampledSeries(max_points)
+        self.dealer_values = DownsampledSeries(max_points)
+
+    def record_step(self, action, info):
+        self.steps += 1
+        self.action_counts[action] += 1
+        self.player_values.add(info.get('player_value', 0))
+        self.dealer_values.add(info.get('dealer_value', 0))
+        self.bet_amounts.add(info.get('bet_amount', 0))
+
+    def record_episode(self, episode_reward, num_steps, balance, win_loss=None):
+        self.episodes += 1
+        self.total_reward += episode_reward
+        self.rewards.add(episode_reward / num_steps)
+        self.cumulative_rewards.add(self.total_reward)
+        self.balances.add(balance)
+        self.reward_window.add(episode_reward)
+        if win_loss == 'player':
+            self.total_wins += 1
+            self.win_window.add(1.0)
+        elif win_loss == 'dealer':
+            self.total_losses += 1
+            self.win_window.add(0.0)
+
+    @property
+    def win_rate(self):
+        return self.total_wins / max(self.total_wins + self.total_losses, 1)
+
+    def summary(self):
+        return {
+            'episodes': self.episodes,
+            'steps': self.steps,
+            'total_reward': self.total_reward,
+            'mean_reward': self.reward_window.mean,
+            'wins': self.total_wins,
+            'losses': self.total_losses,
+            'win_rate': self.win_rate,
+            'window_win_rate': self.win_window.mean,
+            'balance': self.balances.last,
+            'action_counts': self.action_counts.tolist(),
+        }
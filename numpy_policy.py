@@ -0,0 +1,63 @@
+import sys
+
+import numpy as np
+
+
+def _torch_arrays(model_path):
+    # torch is only needed to export; NumpyPolicy loads the result without it
+    import torch
+
+    state_dict = torch.load(model_path, map_location='cpu')
+    layers = sorted({int(key.split('.')[0]) for key in state_dict if key.endswith('.weight')})
+    arrays = {}
+    for i, layer in enumerate(layers):
+        # Stored as (in, out) so inference is a plain x @ W + b
+        arrays[f"w{i}"] = state_dict[f"{layer}.weight"].detach().numpy().T.astype(np.float32)
+        arrays[f"b{i}"] = state_dict[f"{layer}.bias"].detach().numpy().astype(np.float32)
+    return arrays
+
+
+def export_npz(model_path='final_model.pth', npz_path='final_model.npz'):
+    np.savez(npz_path, **_torch_arrays(model_path))
+
+
+class NumpyPolicy:
+    """Greedy policy of the DQN's ReLU MLP evaluated with NumPy only, for serving without torch."""
+
+    def __init__(self, weights, biases):
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+
+    @classmethod
+    def load(cls, path='final_model.npz'):
+        with np.load(path) as data:
+            count = len(data.files) // 2
+            return cls([data[f"w{i}"] for i in range(count)], [data[f"b{i}"] for i in range(count)])
+
+    @classmethod
+    def from_torch(cls, model_path='final_model.pth'):
+        arrays = _torch_arrays(model_path)
+        count = len(arrays) // 2
+        return cls([arrays[f"w{i}"] for i in range(count)], [arrays[f"b{i}"] for i in range(count)])
+
+    def q_values(self, states):
+        x = np.asarray(states, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w + b
+            if i < last:
+                np.maximum(x, 0, out=x)
+        return x
+
+    def act(self, state):
+        return int(np.argmax(self.q_values(state)))
+
+    def act_batch(self, states):
+        return np.argmax(self.q_values(states), axis=1)
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'final_model.pth'
+    npz_path = sys.argv[2] if len(sys.argv) > 2 else 'final_model.npz'
+    export_npz(model_path, npz_path)
+    print(f"Exported {model_path} to {npz_path}")
@@ -0,0 +1,149 @@
+import argparse
+import queue
+import threading
+import time
+
+import numpy as np
+import torch
+
+from bankroll_store import BankrollStore
+from blackjack_env import BlackjackEnv
+from dqn_agent import DQNAgent
+from trajectory import TrajectoryReader
+
+
+class TransitionLoader:
+    """Streams shuffled minibatches of transitions from trajectory shards.
+
+    A background thread decompresses chunks (in a random order each epoch) into a shuffle buffer of
+    ``shuffle_buffer`` records. Each batch is drawn at random from the buffer and its slots are refilled
+    from the stream, so memory is bounded by the buffer and ``prefetch`` ready batches, not the dataset.
+    Iterating yields (states, actions, rewards, next_states, dones) numpy arrays.
+    """
+
+    def __init__(self, directory, batch_size=64, shuffle_buffer=100000, prefetch=8, epochs=1, seed=None):
+        self.reader = TrajectoryReader(directory)
+        self.batch_size = batch_size
+        self.shuffle_buffer = max(shuffle_buffer, batch_size)
+        self.prefetch = prefetch
+        self.epochs = epochs
+        self.rng = np.random.default_rng(seed)
+        self.samples = 0
+        self.wait_time = 0.0  # Time the consumer spent blocked on the loader
+
+    def __len__(self):
+        return -(-self.epochs * self.reader.num_records // self.batch_size)
+
+    def _records(self):
+        # Yields the dataset as record arrays of batch_size, epoch after epoch
+        pending = None
+        for _ in range(self.epochs):
+            for i in self.rng.permutation(len(self.reader.index)):
+                chunk = self.reader.read_chunk(i)
+                if pending is not None:
+                    chunk = np.concatenate([pending, chunk])
+                whole = len(chunk) - len(chunk) % self.batch_size
+                for start in range(0, whole, self.batch_size):
+                    yield chunk[start:start + self.batch_size]
+                pending = chunk[whole:] if whole < len(chunk) else None
+        if pending is not None:
+            yield pending
+
+    def _batch(self, records):
+        return (records['state'], records['action'].astype(np.int64), records['reward'],
+                records['next_state'], records['done'].astype(np.float32))
+
+    def _fill(self, batches, stop):
+        try:
+            buffer = np.empty(self.shuffle_buffer, dtype=self.reader.dtype)
+            size = 0
+            for records in self._records():
+                if size + len(records) <= self.shuffle_buffer:
+                    buffer[size:size + len(records)] = records
+                    size += len(records)
+                    continue
+                # Emit a random batch from the buffer and put the incoming records in its place
+                idx = self.rng.choice(size, size=len(records), replace=False)
+                if not self._put(batches, stop, self._batch(buffer[idx])):
+                    return
+                buffer[idx] = records
+            buffer = buffer[:size]
+            self.rng.shuffle(buffer)
+            for start in range(0, size, self.batch_size):
+                if not self._put(batches, stop, self._batch(buffer[start:start + self.batch_size])):
+                    return
+        except Exception as error:
+            self._put(batches, stop, error)
+        self._put(batches, stop, None)
+
+    def _put(self, batches, stop, item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._fill, args=(batches, stop), name='transition-loader', daemon=True)
+        thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = batches.get()
+                self.wait_time += time.perf_counter() - start
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                self.samples += len(batch[1])
+                yield batch
+        finally:
+            stop.set()
+            thread.join()
+
+
+def train_offline(directory, epochs=1, model_path=None, batch_size=64, shuffle_buffer=100000, prefetch=8,
+                  print_interval=1000, seed=None, save_path='offline_model.pth'):
+    # Separate streams for the agent and the loader's shuffling, as in train_dqn
+    loader_rng, agent_rng = np.random.default_rng(seed).spawn(2)
+    env = BlackjackEnv(bankroll_store=BankrollStore())  # Only used for the state and action sizes
+    agent = DQNAgent(env, seed=agent_rng)
+    if model_path:
+        agent.load(model_path)
+    loader = TransitionLoader(directory, batch_size=batch_size, shuffle_buffer=shuffle_buffer, prefetch=prefetch,
+                              epochs=epochs, seed=loader_rng)
+
+    def to_tensor(array):
+        return torch.from_numpy(array).to(agent.device, non_blocking=True)
+
+    start_time = time.monotonic()
+    for batch in loader:
+        agent.learn(*(to_tensor(array) for array in batch))
+        if agent.train_steps % print_interval == 0:
+            elapsed = time.monotonic() - start_time
+            print(f"Updates: {agent.train_steps}/{len(loader)}, samples/sec: {loader.samples / elapsed:.0f},"
+                  f" waiting on loader: {loader.wait_time / elapsed:.0%}")
+
+    elapsed = time.monotonic() - start_time
+    print(f"Trained on {loader.samples} samples in {elapsed:.1f}s ({loader.samples / max(elapsed, 1e-9):.0f}"
+          f" samples/sec, {loader.wait_time / max(elapsed, 1e-9):.0%} waiting on loader)")
+    agent.save(save_path)
+    return agent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the DQN from recorded trajectory shards")
+    parser.add_argument('directory', help="directory written by trajectory.TrajectoryRecorder")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--model', help="weights to start from")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--shuffle-buffer', type=int, default=100000, help="transitions held for shuffling")
+    parser.add_argument('--prefetch', type=int, default=8, help="ready batches queued ahead of training")
+    parser.add_argument('--output', default='offline_model.pth')
+    args = parser.parse_args()
+    train_offline(args.directory, epochs=args.epochs, model_path=args.model, batch_size=args.batch_size,
+                  shuffle_buffer=args.shuffle_buffer, prefetch=args.prefetch, save_path=args.output)
@@ -1,47 +1,13 @@
-import random
-import json
-
-
-class Card:
-    def __init__(self, suit, value):
-        self.suit = suit
-        self.value = value
-
-    def __str__(self):
-        return f"{self.value} of {self.suit}"
-
-    def get_value(self):
-        if self.value in ['J', 'Q', 'K']:
-            return 10
-        if self.value == 'A':
-            return 11
-        return int(self.value)
-
-
-class Deck:
-    def __init__(self, num_decks=1):
-        self.num_decks = num_decks
-        self.cards = []
-        self.build_deck()
-
-    def build_deck(self):
-        suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-        values = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.cards = [Card(suit, value) for suit in suits for value in values] * self.num_decks
-        random.shuffle(self.cards)
-
-    def draw_card(self):
-        if len(self.cards) == 0:
-            self.build_deck()
-        return self.cards.pop()
+from bankroll_store import default_store
+from game_logic import Deck, Hand, CARD_VALUES, ACE
 
 
 class Player:
     def __init__(self, name, money):
         self.name = name
         self.money = money
-        self.hand = []
-        self.split_hand = []
+        self.hand = Hand()
+        self.split_hand = Hand()
         self.current_bet = 0
         self.split_bet = 0
         self.doubled_down = False
@@ -53,8 +19,8 @@ class Player:
             self.hand.append(card)
 
     def clear_hand(self):
-        self.hand = []
-        self.split_hand = []
+        self.hand = Hand()
+        self.split_hand = Hand()
         self.doubled_down = False
 
     def place_bet(self, amount):
@@ -66,11 +32,10 @@ class Player:
         self.money -= self.split_bet
 
     def can_split(self):
-        return len(self.hand) == 2 and self.hand[0].value == self.hand[1].value
+        return len(self.hand) == 2 and self.hand[0] % 13 == self.hand[1] % 13
 
     def can_double_down(self):
-        total = sum(card.get_value() for card in self.hand)
-        return total in [9, 10, 11]
+        return self.hand.hard_total + 10 * self.hand.aces in [9, 10, 11]  # Every ace counted as 11
 
     def double_down(self):
         if self.can_double_down():
@@ -85,23 +50,17 @@ class Player:
 
 
 class Game:
-    def __init__(self, num_decks=1):
-        self.deck = Deck(num_decks)
+    def __init__(self, num_decks=1, bankroll_store=None, rng=None):
+        self.deck = Deck(num_decks, rng=rng)
+        self.bankroll_store = bankroll_store if bankroll_store is not None else default_store()
         self.player = Player("Player", self.load_player_money())
         self.dealer = Player("Dealer", 0)
 
     def load_player_money(self):
-        try:
-            with open('player_data.json', 'r') as file:
-                data = json.load(file)
-                return data.get('player_money', 1000)
-        except FileNotFoundError:
-            return 1000
+        return self.bankroll_store.load('player_money', 1000)
 
     def save_player_money(self):
-        with open('player_data.json', 'w') as file:
-            data = {'player_money': self.player.money}
-            json.dump(data, file)
+        self.bankroll_store.save('player_money', self.player.money)
 
     def start_round(self):
         self.player.clear_hand()
@@ -138,8 +97,10 @@ class Game:
             self.dealer.receive_card(self.deck.draw_card())
 
     def get_hand_value(self, hand):
-        value = sum(card.get_value() for card in hand)
-        aces = sum(1 for card in hand if card.value == 'A')
+        if isinstance(hand, Hand):
+            return hand.value
+        value = sum(CARD_VALUES[card] for card in hand)
+        aces = sum(1 for card in hand if card % 13 == ACE)
         while value > 21 and aces:
             value -= 10
             aces -= 1
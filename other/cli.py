@@ -1,5 +1,6 @@
 # cli.py
 import os
+from game_logic import Card
 
 
 def clear_screen():
@@ -47,16 +48,16 @@ def display_hands(player, dealer, initial=False):
     clear_screen()
     print("\nDealer's Hand:")
     if initial:
-        print(f" [ {dealer.hand[0]} , Hidden ]")
+        print(f" [ {Card.from_code(dealer.hand[0])} , Hidden ]")
     else:
-        print(" [" + " , ".join(str(card) for card in dealer.hand) + " ]")
+        print(" [" + " , ".join(str(Card.from_code(card)) for card in dealer.hand) + " ]")
 
     print("\nPlayer's Hand:")
-    print(" [" + " , ".join(str(card) for card in player.hand) + " ]")
+    print(" [" + " , ".join(str(Card.from_code(card)) for card in player.hand) + " ]")
     print(f"\nPlayer's money: ${player.money}")
     if player.split_hand:
         print("\nPlayer's Split Hand:")
-        print(" [" + " , ".join(str(card) for card in player.split_hand) + " ]")
+        print(" [" + " , ".join(str(Card.from_code(card)) for card in player.split_hand) + " ]")
 
 
 def display_result(winner):
@@ -1,47 +1,32 @@
-import torch
 import numpy as np
-import json
 from blackjack_env import BlackjackEnv
-from dqn_blackjack import Agent
+from dqn_agent import DQNAgent
+from trajectory import TrajectoryRecorder, to_json
 
 
-def log_agent_behavior(agent, env, num_games=20, log_file='agent_behavior_log.json'):
-    game_data = []
-    for game in range(num_games):
-        state = env.reset()
-        state = np.array(state).reshape(1, -1)  # Ensure state is a 2D array
-        game_log = {'game': game, 'steps': []}
-        while True:
-            action = agent.act(state)
-            next_state, reward, done, _ = env.step(action)
-            dealer_cards = [str(card) for card in env.game.dealer.hand]
-            player_cards = [str(card) for card in env.game.player.hand]
-            game_log['steps'].append({
-                'state': state.tolist(),
-                'action': action,
-                'reward': reward,
-                'next_state': next_state.tolist(),
-                'done': done,
-                'dealer_cards': dealer_cards,
-                'player_cards': player_cards,
-                'bet': env.game.player.current_bet,
-                'win_loss': 'win' if reward > 0 else 'loss' if reward < 0 else 'tie'
-            })
-            state = np.array(next_state).reshape(1, -1)
-            if done:
-                break
-        game_data.append(game_log)
-
-    with open(log_file, 'w') as f:
-        json.dump(game_data, f, indent=4)
+def log_agent_behavior(agent, env, num_games=20, log_dir='agent_behavior_log', json_file=None):
+    # Streams every step to compressed shards in log_dir; json_file optionally gets a readable copy
+    with TrajectoryRecorder(log_dir, state_size=env.observation_space.shape[0]) as recorder:
+        for _ in range(num_games):
+            state = np.asarray(env.reset())
+            recorder.start_game()
+            while True:
+                action = agent.act(state)
+                next_state, reward, done, _ = env.step(action)
+                recorder.record(state, action, reward, next_state, done, env.game.player.hand,
+                                env.game.dealer.hand, env.game.player.current_bet)
+                state = np.asarray(next_state)
+                if done:
+                    break
+    if json_file is not None:
+        to_json(log_dir, json_file)
 
 
 if __name__ == "__main__":
     env = BlackjackEnv()
-    state_size = env.observation_space.shape[0]
-    action_size = 13  # 10 bet sizes + 3 moves
-    agent = Agent(state_size, action_size)
-    agent.load("dqn_blackjack.pth")  # Load the trained model
+    agent = DQNAgent(env)
+    agent.load("final_model.pth")  # Load the trained model
+    agent.epsilon = 0.0
 
     # Log the agent's behavior for 20 games
-    log_agent_behavior(agent, env, num_games=20, log_file='agent_behavior_log.json')
+    log_agent_behavior(agent, env, num_games=20, json_file='agent_behavior_log.json')
@@ -1,6 +1,7 @@
 # q_learning.py
 import numpy as np
 from blackjack_env import BlackjackEnv
+from dp_solver import q_table_index
 import matplotlib.pyplot as plt
 import os
 
@@ -31,7 +32,8 @@ def choose_action(state):
 # Training the agent
 rewards = []
 for episode in range(num_episodes):
-    state = env.reset()
+    env.reset()
+    state = q_table_index(env.game)
     total_reward = 0
     done = False
 
@@ -41,7 +43,8 @@ for episode in range(num_episodes):
 
     while not done:
         action = choose_action(state)
-        next_state, reward, done, _ = env.step(action)
+        _, reward, done, _ = env.step(action)
+        next_state = q_table_index(env.game)
         Q[state][action] = Q[state][action] + alpha * (reward + gamma * np.max(Q[next_state]) - Q[state][action])
         state = next_state
         total_reward += reward
@@ -0,0 +1,105 @@
+# test_decision_server.py
+import asyncio
+
+import numpy as np
+from decision_server import DecisionClient, DecisionServer, MicroBatcher, run_fleet
+from numpy_policy import NumpyPolicy
+
+NUM_TABLES = 32
+HANDS_PER_TABLE = 20
+
+
+class RecordingPolicy(NumpyPolicy):
+    # Remembers every state it was asked about and the action it gave
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.decisions = []
+
+    def act_batch(self, states):
+        actions = super().act_batch(states)
+        self.decisions.extend(zip(states, actions))
+        return actions
+
+
+def random_policy():
+    rng = np.random.default_rng(0)
+    sizes = [5, 16, 16, 3]
+    return RecordingPolicy([rng.normal(size=(n, m)) for n, m in zip(sizes, sizes[1:])],
+                           [rng.normal(size=m) for m in sizes[1:]])
+
+
+async def drive_fleet(policy):
+    server = DecisionServer(MicroBatcher(policy, max_batch_size=16, max_wait=0.005))
+    await server.start()
+    client = DecisionClient()
+    await client.connect(server.host, server.port)
+    try:
+        result = await run_fleet(client.decide, NUM_TABLES, HANDS_PER_TABLE)
+    finally:
+        await client.close()
+        await server.stop()
+    return result, server.batcher.stats()
+
+
+def test_fleet_over_localhost():
+    policy = random_policy()
+    result, stats = asyncio.run(drive_fleet(policy))
+
+    assert result['hands'] == NUM_TABLES * HANDS_PER_TABLE
+    assert stats['decisions'] == result['decisions'] == len(policy.decisions)
+    assert stats['queue_depth'] == 0
+    assert sum(size * n for size, n in stats['batch_size_histogram'].items()) == stats['decisions']
+    assert max(stats['batch_size_histogram']) > 1  # Concurrent tables were coalesced
+    assert max(stats['batch_size_histogram']) <= 16
+    assert 0 < stats['latency_p50_ms'] <= stats['latency_p99_ms']
+    for state, action in policy.decisions[:200]:
+        assert policy.act(state) == action
+
+
+class FailingPolicy:
+    def act_batch(self, states):
+        raise ValueError("policy failed")
+
+
+async def decide_with_failing_policy():
+    server = DecisionServer(MicroBatcher(FailingPolicy(), max_batch_size=16, max_wait=0.005))
+    await server.start()
+    client = DecisionClient()
+    await client.connect(server.host, server.port)
+    try:
+        return await asyncio.wait_for(client.decide(np.zeros(5)), timeout=5)
+    finally:
+        await client.close()
+        await server.stop()
+
+
+def test_policy_error_reaches_client():
+    try:
+        asyncio.run(decide_with_failing_policy())
+    except RuntimeError as error:
+        assert "failed on request 0" in str(error)
+    else:
+        raise AssertionError("decide() should fail when the policy raises")
+
+
+async def stop_with_requests_in_flight():
+    batcher = MicroBatcher(random_policy(), max_batch_size=64, max_wait=10.0)
+    batcher.start()
+    decide = [asyncio.ensure_future(batcher.decide(np.zeros(5))) for _ in range(10)]
+    await asyncio.sleep(0.05)  # The batcher holds these, waiting for the batch to fill
+    decide += [asyncio.ensure_future(batcher.decide(np.zeros(5))) for _ in range(5)]
+    await asyncio.sleep(0)  # Queued, not yet picked up
+    await batcher.stop()
+    return await asyncio.wait_for(asyncio.gather(*decide, return_exceptions=True), timeout=5)
+
+
+def test_stop_fails_pending_requests():
+    results = asyncio.run(stop_with_requests_in_flight())
+    assert len(results) == 15
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+if __name__ == "__main__":
+    result, stats = asyncio.run(drive_fleet(random_policy()))
+    print(result)
+    print(stats)
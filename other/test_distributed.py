@@ -0,0 +1,119 @@
+# test_distributed.py
+import json
+import socket
+import threading
+import zlib
+
+import numpy as np
+import torch.multiprocessing as mp
+from distributed import FRAME_HEADER, MAX_FRAME_BYTES, ParameterServer, recv_message, run_worker, send_message
+
+EPISODES = 300
+
+
+def test_local_cluster_with_a_straggler():
+    server = ParameterServer(chunk_episodes=10, weight_sync_interval=5, worker_timeout=2.0)
+    # Registers and then never talks again; the server must drop it without stalling training
+    straggler = socket.create_connection((server.host, server.port))
+    send_message(straggler, {'type': 'register', 'name': 'straggler'})
+    recv_message(straggler)
+
+    ctx = mp.get_context('spawn')
+    workers = [ctx.Process(target=run_worker, args=(server.host, server.port, f"worker-{i}", i, 0.1), daemon=True)
+               for i in range(2)]
+    for worker in workers:
+        worker.start()
+    try:
+        agent = server.train(EPISODES, print_interval=10 ** 9)
+    finally:
+        server.close()
+        for worker in workers:
+            worker.join(timeout=10)
+        straggler.close()
+    stats = server.stats()
+
+    assert not any(worker.is_alive() for worker in workers)
+    assert agent.train_steps > 0
+    by_name = {worker['name']: worker for worker in stats.values()}
+    assert by_name['straggler']['chunks'] == 0 and not by_name['straggler']['alive']
+    for name in ('worker-0', 'worker-1'):
+        assert by_name[name]['chunks'] > 0 and by_name[name]['steps'] > 0
+        assert by_name[name]['weight_version'] >= 0
+    assert sum(worker['episodes'] for worker in stats.values()) >= EPISODES
+
+
+def send_raw(sock, message, body):
+    header = json.dumps(message).encode()
+    sock.sendall(FRAME_HEADER.pack(len(header), len(body)) + header + body)
+
+
+def expect_rejected(message, body):
+    sender, receiver = socket.socketpair()
+    with sender, receiver:
+        thread = threading.Thread(target=send_raw, args=(sender, message, body), daemon=True)
+        thread.start()  # The body can be larger than the socket buffer
+        try:
+            recv_message(receiver)
+        except ValueError:
+            return
+        finally:
+            thread.join()
+    raise AssertionError("recv_message accepted a malformed frame")
+
+
+def test_frames_are_bounded():
+    sender, receiver = socket.socketpair()
+    with sender, receiver:
+        send_message(sender, {'type': 'chunk'}, {'rewards': np.arange(10, dtype=np.float32)})
+        message, arrays = recv_message(receiver)
+    assert message == {'type': 'chunk'} and np.array_equal(arrays['rewards'], np.arange(10))
+
+    # A few hundred KB of zeros that inflate past MAX_FRAME_BYTES
+    bomb = zlib.compressobj(9)
+    body = b''.join(bomb.compress(bytes(1 << 20)) for _ in range(MAX_FRAME_BYTES >> 20)) + \
+        bomb.compress(bytes(1 << 20)) + bomb.flush()
+    expect_rejected({'arrays': [['x', '|u1', [16]]]}, body)
+    # Declared arrays larger than the frame limit, or not matching the body
+    expect_rejected({'arrays': [['x', '<f8', [MAX_FRAME_BYTES]]]}, zlib.compress(bytes(8)))
+    expect_rejected({'arrays': [['x', '<f4', [4]]]}, zlib.compress(bytes(8)))
+
+
+def test_train_stops_when_every_worker_is_gone():
+    server = ParameterServer(worker_timeout=1.0)
+    try:
+        try:
+            server.train(10, startup_timeout=1.0)
+        except RuntimeError as error:
+            assert "No worker registered" in str(error)
+        else:
+            raise AssertionError("train() should give up without workers")
+
+        worker = socket.create_connection((server.host, server.port))
+        send_message(worker, {'type': 'register', 'name': 'short-lived'})
+        recv_message(worker)
+        send_message(worker, {'type': 'goodbye'})
+        worker.close()
+        try:
+            server.train(10)
+        except RuntimeError as error:
+            assert "All workers disconnected" in str(error)
+        else:
+            raise AssertionError("train() should give up once every worker is gone")
+    finally:
+        server.close()
+
+
+def test_malformed_array_entries_are_rejected():
+    expect_rejected({'arrays': [['x', '<f4', 'abc']]}, b'')
+    expect_rejected({'arrays': [['x', '<f4', [1.5]]]}, b'')
+    expect_rejected({'arrays': [['x', 'not-a-dtype', [1]]]}, b'')
+    expect_rejected({'arrays': [['x', '<f4']]}, b'')
+    expect_rejected({'arrays': 'x'}, b'')
+
+
+if __name__ == "__main__":
+    test_train_stops_when_every_worker_is_gone()
+    test_malformed_array_entries_are_rejected()
+    test_frames_are_bounded()
+    test_local_cluster_with_a_straggler()
+    print("Distributed self-play ran on localhost")
@@ -0,0 +1,44 @@
+# test_numpy_policy.py
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import torch
+from dqn_agent import build_network
+from numpy_policy import NumpyPolicy, export_npz
+
+
+def exported_policy(directory):
+    torch.manual_seed(0)
+    model = build_network(5, 3)
+    model_path = os.path.join(directory, 'model.pth')
+    npz_path = os.path.join(directory, 'model.npz')
+    torch.save(model.state_dict(), model_path)
+    export_npz(model_path, npz_path)
+    return model, NumpyPolicy.load(npz_path)
+
+
+def test_matches_torch_outputs():
+    with tempfile.TemporaryDirectory() as tmp:
+        model, policy = exported_policy(tmp)
+    states = np.random.default_rng(0).random((1000, 5), dtype=np.float32) * [1, 1, 1, 20, 0.1]
+    with torch.no_grad():
+        expected = model(torch.from_numpy(states.astype(np.float32))).numpy()
+
+    np.testing.assert_allclose(policy.q_values(states), expected, rtol=1e-5, atol=1e-5)
+    assert (policy.act_batch(states) == expected.argmax(1)).all()
+    assert [policy.act(state) for state in states[:50]] == list(expected[:50].argmax(1))
+
+
+def test_import_does_not_load_torch():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, numpy_policy; assert 'torch' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
+
+
+if __name__ == "__main__":
+    test_matches_torch_outputs()
+    test_import_does_not_load_torch()
+    print("NumPy policy matches torch")
@@ -0,0 +1,80 @@
+# test_prioritized_replay.py
+import os
+import tempfile
+
+import numpy as np
+from bankroll_store import BankrollStore
+from blackjack_env import BlackjackEnv
+from checkpoint import load_checkpoint, save_checkpoint
+from dqn_agent import DQNAgent
+from replay_buffer import PrioritizedReplayBuffer, SumTree
+
+
+def test_sum_tree_matches_cumulative_sums():
+    for fanout in (2, 4, 32):
+        rng = np.random.default_rng(fanout)
+        values = rng.random(1000)
+        tree = SumTree(1000, fanout=fanout)
+        tree.update(np.arange(1000), values)
+        assert np.isclose(tree.total, values.sum())
+
+        queries = rng.random(5000) * tree.total
+        expected = np.searchsorted(np.cumsum(values), queries, side='right')
+        assert np.array_equal(tree.find(queries), expected)
+
+        tree.update([3, 3, 999], [0.0, 5.0, 2.0])  # Repeated indices keep the last value
+        values[[3, 999]] = [5.0, 2.0]
+        assert np.isclose(tree.total, values.sum())
+        rebuilt = SumTree(1000, fanout=fanout)
+        rebuilt.rebuild(values)
+        for level, rebuilt_level in zip(tree.levels, rebuilt.levels):
+            assert np.allclose(level, rebuilt_level)
+
+
+def test_sampling_follows_priorities():
+    buffer = PrioritizedReplayBuffer(8, 2, seed=1, alpha=1.0, beta=0.5, anneal_steps=1)
+    for i in range(4):
+        buffer.add(np.zeros(2), 0, 0.0, np.zeros(2), False)
+    buffer.update_priorities(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]) - buffer.priority_epsilon)
+
+    counts = np.zeros(4)
+    for _ in range(500):
+        *_, weights, idx = buffer.sample_arrays(20)
+        counts += np.bincount(idx, minlength=4)
+    assert np.allclose(counts / counts.sum(), [0.1, 0.2, 0.3, 0.4], atol=0.01)
+    assert buffer.beta == 1.0  # Fully annealed after anneal_steps samples
+    assert np.isclose(weights.max(), 1.0)
+    assert np.allclose(weights * np.array([0.1, 0.2, 0.3, 0.4])[idx], 0.1)  # w_i proportional to 1 / P(i)
+
+
+def test_prioritized_agent_checkpoint_round_trip():
+    env = BlackjackEnv(bankroll_store=BankrollStore(), seed=0)
+    agent = DQNAgent(env, seed=0, prioritized_replay=True, memory_size=500)
+    for _ in range(100):
+        state = env.reset()
+        for _ in range(20):
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            agent.remember(state, action, reward, next_state, done)
+            state = next_state
+            if done:
+                break
+        if len(agent.memory) > 32:
+            agent.replay(32)
+    assert len(np.unique(agent.memory.priorities[:len(agent.memory)])) > 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'checkpoint.npz')
+        save_checkpoint(agent, 99, path)
+        resumed = DQNAgent(env, seed=1, prioritized_replay=True, memory_size=500)
+        load_checkpoint(resumed, path)
+    assert np.array_equal(resumed.memory.tree.leaves, agent.memory.tree.leaves)
+    assert resumed.memory.beta == agent.memory.beta
+    assert np.array_equal(resumed.memory.sample_arrays(32)[-1], agent.memory.sample_arrays(32)[-1])
+
+
+if __name__ == "__main__":
+    test_sum_tree_matches_cumulative_sums()
+    test_sampling_follows_priorities()
+    test_prioritized_agent_checkpoint_round_trip()
+    print("Prioritized replay tests passed")
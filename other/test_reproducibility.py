@@ -0,0 +1,90 @@
+# test_reproducibility.py
+import os
+import random
+import tempfile
+
+import numpy as np
+import torch
+from bankroll_store import BankrollStore
+from blackjack_env import BlackjackEnv
+from checkpoint import load_checkpoint, save_checkpoint
+from dqn_agent import DQNAgent
+from evaluator import evaluate
+from game_logic import Game
+
+
+def run_training(seed, episodes=60, batch_size=32, start_episode=0, checkpoint_path=None):
+    env_rng, agent_rng = np.random.default_rng(seed).spawn(2)  # As in train_dqn
+    env = BlackjackEnv(bankroll_store=BankrollStore(), seed=env_rng)
+    agent = DQNAgent(env, seed=agent_rng)
+    if start_episode:
+        load_checkpoint(agent, checkpoint_path)
+    trajectory = []
+    for _ in range(start_episode, episodes):
+        state = env.reset()
+        done = False
+        while not done:
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            agent.remember(state, action, reward, next_state, done)
+            trajectory.append((action, reward))
+            state = next_state
+        if len(agent.memory) > batch_size:
+            agent.replay(batch_size)
+    if checkpoint_path and not start_episode:
+        save_checkpoint(agent, episodes - 1, checkpoint_path)
+    weights = torch.cat([p.detach().flatten() for p in agent.model.parameters()]).numpy()
+    return trajectory, weights
+
+
+def test_seeded_training_is_bit_for_bit_reproducible():
+    global_state = (random.getstate(), np.random.get_state()[1].copy(), torch.get_rng_state())
+    first_trajectory, first_weights = run_training(7)
+    second_trajectory, second_weights = run_training(7)
+    other_trajectory, _ = run_training(8)
+
+    assert first_trajectory == second_trajectory
+    assert np.array_equal(first_weights, second_weights)
+    assert first_trajectory != other_trajectory
+    # No draws from the global random modules
+    assert random.getstate() == global_state[0]
+    assert np.array_equal(np.random.get_state()[1], global_state[1])
+    assert torch.equal(torch.get_rng_state(), global_state[2])
+
+
+def test_resumed_training_matches_a_straight_run():
+    straight_trajectory, straight_weights = run_training(7, episodes=80)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'checkpoint.npz')
+        first_trajectory, _ = run_training(7, episodes=50, checkpoint_path=path)
+        # The resumed process starts from other seeds; everything that matters comes from the checkpoint
+        second_trajectory, resumed_weights = run_training(99, episodes=80, start_episode=50, checkpoint_path=path)
+
+    assert first_trajectory + second_trajectory == straight_trajectory
+    assert np.array_equal(resumed_weights, straight_weights)
+
+
+def test_child_streams_deal_different_shoes():
+    parent = np.random.SeedSequence(3)
+    games = [Game(num_decks=6, bankroll_store=BankrollStore(), rng=child) for child in parent.spawn(2)]
+    draws = [[game.deck.draw_card() for _ in range(1000)] for game in games]
+    assert draws[0] != draws[1]
+
+    replay = Game(num_decks=6, bankroll_store=BankrollStore(), rng=np.random.SeedSequence(3).spawn(1)[0])
+    assert [replay.deck.draw_card() for _ in range(1000)] == draws[0]
+
+
+def test_multiprocess_evaluation_is_reproducible():
+    q_table = np.random.default_rng(0).random((32, 11, 2, 3))
+    reports = [evaluate(q_table, num_tables=256, num_processes=2, target_se=0.0, max_hands=20000, seed=5)
+               for _ in range(2)]
+    for key in ('hands', 'house_edge', 'win_rate', 'reward'):
+        assert reports[0][key] == reports[1][key]
+
+
+if __name__ == "__main__":
+    test_seeded_training_is_bit_for_bit_reproducible()
+    test_resumed_training_matches_a_straight_run()
+    test_child_streams_deal_different_shoes()
+    test_multiprocess_evaluation_is_reproducible()
+    print("Seeded runs are reproducible")
@@ -0,0 +1,85 @@
+# test_sweep.py
+import json
+import os
+import tempfile
+
+import numpy as np
+from sweep import DEFAULT_SPACE, Sweep, rung_budgets, run_trial, sample_config
+
+
+def test_rung_budgets():
+    assert rung_budgets(100, 2700, 3) == [100, 300, 900, 2700]
+    assert rung_budgets(20, 100, 3) == [20, 60, 100]
+
+
+def test_configs_are_reproducible():
+    configs = [sample_config(DEFAULT_SPACE, np.random.default_rng(4)) for _ in range(2)]
+    assert configs[0] == configs[1]
+    assert 1e-4 <= configs[0]['learning_rate'] <= 3e-3
+    assert configs[0]['hidden_size'] in DEFAULT_SPACE['hidden_size']
+
+
+def test_sweep_promotes_and_resumes():
+    with tempfile.TemporaryDirectory() as directory:
+        options = dict(min_episodes=10, max_episodes=30, reduction_factor=3, workers=1, eval_hands=2000)
+        leaderboard = Sweep(directory, num_trials=3, **options).run()
+        # The best of the three trials at 10 episodes is promoted to 30
+        assert leaderboard[0]['episodes'] == 30
+        assert len(leaderboard) == 3
+
+        with open(os.path.join(directory, 'results.jsonl')) as file:
+            lines = len(file.readlines())
+        resumed = Sweep(directory, num_trials=3, **options)
+        assert resumed.run() == leaderboard
+        with open(os.path.join(directory, 'results.jsonl')) as file:
+            assert len(file.readlines()) == lines  # Nothing left to run
+            file.seek(0)
+            assert all(json.loads(line)['type'] in ('trial', 'job', 'result') for line in file)
+
+
+def test_resume_reruns_interrupted_jobs():
+    with tempfile.TemporaryDirectory() as directory:
+        options = dict(min_episodes=10, max_episodes=30, reduction_factor=3, workers=1, eval_hands=2000)
+        # Killed right after trial 0 was submitted, before its first result came back
+        Sweep(directory, num_trials=3, **options)._new_trial()
+        sweep = Sweep(directory, num_trials=3, **options)
+        assert sweep.pending == [(0, 0)]
+        leaderboard = sweep.run()
+        assert sorted(record['trial'] for record in leaderboard) == [0, 1, 2]
+        assert leaderboard[0]['episodes'] == 30
+
+        # Killed while a promoted trial was training towards the last rung
+        with open(os.path.join(directory, 'results.jsonl')) as file:
+            lines = file.readlines()
+        final = next(i for i, line in enumerate(lines) if json.loads(line).get('episodes') == 30
+                     and json.loads(line)['type'] == 'result')
+        with open(os.path.join(directory, 'results.jsonl'), 'w') as file:
+            file.writelines(lines[:final] + lines[final + 1:])
+        resumed = Sweep(directory, num_trials=3, **options)
+        assert resumed.pending == [(leaderboard[0]['trial'], 1)]
+        assert resumed.run()[0]['episodes'] == 30
+
+
+def test_rerun_after_checkpoint_only_evaluates():
+    config = sample_config(DEFAULT_SPACE, np.random.default_rng(0))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trial-0000.npz')
+        first = run_trial(0, config, 1, 0, 10, path, 2000, 0)
+        second = run_trial(0, config, 1, 10, 30, path, 2000, 0)
+        with open(path, 'rb') as file:
+            saved = file.read()
+        # Killed after the checkpoint at 30 episodes was written but before the result was recorded
+        rerun = run_trial(0, config, 1, 10, 30, path, 2000, 0)
+        with open(path, 'rb') as file:
+            assert file.read() == saved  # Not trained or saved again
+    assert rerun['score'] == second['score']
+    assert first['episodes'] == 10 and rerun['episodes'] == 30
+
+
+if __name__ == "__main__":
+    test_rung_budgets()
+    test_configs_are_reproducible()
+    test_sweep_promotes_and_resumes()
+    test_resume_reruns_interrupted_jobs()
+    test_rerun_after_checkpoint_only_evaluates()
+    print("Sweep tests passed")
@@ -0,0 +1,54 @@
+# test_trajectory.py
+import json
+import os
+import tempfile
+
+import numpy as np
+from trajectory import TrajectoryReader, TrajectoryRecorder, to_json
+
+
+def record_games(directory, steps_per_game, chunk_records):
+    # Returns the (game, step, action, reward) rows written for each game
+    written = []
+    with TrajectoryRecorder(directory, chunk_records=chunk_records) as recorder:
+        for steps in steps_per_game:
+            game = recorder.start_game()
+            rows = []
+            for step in range(steps):
+                state = np.full(5, game + step / 10, dtype=np.float32)
+                action, reward = (game + step) % 3, float(game * 10 + step)
+                recorder.record(state, action, reward, state + 1, step == steps - 1, [game % 52, 12],
+                                [step % 52], 10)
+                rows.append((game, step, action, reward))
+            written.append(rows)
+    return written
+
+
+def rows(records):
+    return [(int(r['game']), int(r['step']), int(r['action']), float(r['reward'])) for r in records]
+
+
+def test_games_straddling_chunks():
+    for steps_per_game, chunk_records in (([3] * 5, 4), ([1, 9, 2, 4, 1, 3], 4), ([3] * 4, 3)):
+        with tempfile.TemporaryDirectory() as directory:
+            written = record_games(directory, steps_per_game, chunk_records)
+            reader = TrajectoryReader(directory)
+            assert reader.num_games == len(written)
+            assert reader.num_records == sum(steps_per_game)
+            assert [rows(game) for game in reader.iter_games()] == written
+            for game_id in reversed(range(len(written))):
+                assert rows(reader.game(game_id)) == written[game_id]
+
+            json_file = os.path.join(directory, 'games.json')
+            to_json(directory, json_file, games=[1, 3])
+            with open(json_file) as file:
+                games = json.load(file)
+            assert [game['game'] for game in games] == [1, 3]
+            for game in games:
+                assert [step['reward'] for step in game['steps']] == [r for *_, r in written[game['game']]]
+                assert game['steps'][0]['player_cards'][-1] == 'A of Hearts'
+
+
+if __name__ == "__main__":
+    test_games_straddling_chunks()
+    print("Trajectory tests passed")
@@ -0,0 +1,70 @@
+# test_vec_env_parity.py
+import numpy as np
+from blackjack_env import BlackjackEnv
+from vec_blackjack_env import VecBlackjackEnv, PLAYER_WIN, DEALER_WIN, PUSH
+
+NUM_HANDS = 20000
+INITIAL_MONEY = 1000.0
+
+
+# Fixed policy on the observation: double on 11, hit below 17, stand otherwise
+def policy(states):
+    player_value = np.rint(np.atleast_2d(states)[:, 0] * 32)
+    return np.where(player_value == 11, 2, np.where(player_value < 17, 1, 0))
+
+
+def play_scalar(num_hands):
+    env = BlackjackEnv()
+    env.game.player.money = INITIAL_MONEY
+    outcomes, rewards = [], []
+    for _ in range(num_hands):
+        state = env.reset()
+        done = False
+        while not done:
+            state, reward, done, info = env.step(int(policy(state)[0]))
+        outcomes.append({'player': PLAYER_WIN, 'dealer': DEALER_WIN, 'push': PUSH}[info['win_loss']])
+        rewards.append(reward)
+    return np.array(outcomes), np.array(rewards)
+
+
+def play_vectorized(num_hands, num_envs=500):
+    env = VecBlackjackEnv(num_envs=num_envs, initial_money=INITIAL_MONEY, seed=0)
+    states = env.reset()
+    outcomes, rewards = [], []
+    while len(outcomes) < num_hands:
+        states, reward, done, info = env.step(policy(states))
+        outcomes.extend(info['win_loss'][done])
+        rewards.extend(reward[done])
+    return np.array(outcomes[:num_hands]), np.array(rewards[:num_hands])
+
+
+def test_outcome_statistics_match_scalar_env():
+    scalar_outcomes, scalar_rewards = play_scalar(NUM_HANDS)
+    vec_outcomes, vec_rewards = play_vectorized(NUM_HANDS)
+
+    for outcome in (PLAYER_WIN, DEALER_WIN, PUSH):
+        scalar_rate = np.mean(scalar_outcomes == outcome)
+        vec_rate = np.mean(vec_outcomes == outcome)
+        assert abs(scalar_rate - vec_rate) < 0.02, (outcome, scalar_rate, vec_rate)
+
+    # Terminal rewards only take a handful of values, so the means must agree closely too
+    assert abs(scalar_rewards.mean() - vec_rewards.mean()) < 0.15, (scalar_rewards.mean(), vec_rewards.mean())
+    assert set(np.round(vec_rewards, 6)) <= set(np.round(scalar_rewards, 6))
+
+
+def test_auto_reset_returns_fresh_hands():
+    env = VecBlackjackEnv(num_envs=64, initial_money=INITIAL_MONEY, seed=1)
+    states = env.reset()
+    assert states.shape == (64, 5) and states.dtype == np.float32
+    next_states, rewards, done, info = env.step(np.zeros(64, dtype=np.int64))
+    assert done.all()
+    assert (info['win_loss'] != 0).all()
+    # Every table was dealt a new two-card hand after standing
+    assert (env.cursor >= 6).all()
+    assert np.allclose(next_states[:, 4], env.current_bet / 500)
+
+
+if __name__ == "__main__":
+    test_outcome_statistics_match_scalar_env()
+    test_auto_reset_returns_fresh_hands()
+    print("VecBlackjackEnv matches BlackjackEnv outcome statistics")
@@ -0,0 +1,88 @@
+import numpy as np
+
+PLAYER_TOTALS = 32  # Player totals 0-31, as in the Q-table of other/q_learning.py
+DEALER_UPCARDS = 12  # Dealer upcard values 2-11 (Ace = 11)
+DEFAULT_BANKROLLS = (1000, 5000, 10000, 50000, 100000)
+DEFAULT_BETS = (10, 15, 20)  # Every opening bet progressive_betting_strategy can place
+
+
+class PolicyTable:
+    """Greedy actions and Q-values of a policy over the discretized BlackjackEnv state grid.
+
+    Axes are (player total, dealer upcard, usable ace, bankroll bucket, bet bucket);
+    bankroll and bet observations are snapped to the nearest bucket value.
+    """
+
+    def __init__(self, q_values, bankrolls=DEFAULT_BANKROLLS, bets=DEFAULT_BETS):
+        self.q_values = np.asarray(q_values, dtype=np.float32)
+        self.actions = self.q_values.argmax(axis=-1).astype(np.int8)
+        self.bankrolls = np.asarray(bankrolls, dtype=np.float64)
+        self.bets = np.asarray(bets, dtype=np.float64)
+        # Bucket boundaries halfway between neighbouring bucket values
+        self._bankroll_edges = (self.bankrolls[1:] + self.bankrolls[:-1]) / 2
+        self._bet_edges = (self.bets[1:] + self.bets[:-1]) / 2
+
+    def index(self, states):
+        states = np.atleast_2d(states)
+        player_value = np.clip(np.rint(states[:, 0] * 32).astype(np.intp), 0, PLAYER_TOTALS - 1)
+        dealer_value = np.clip(np.rint(states[:, 1] * 11).astype(np.intp), 0, DEALER_UPCARDS - 1)
+        usable_ace = (states[:, 2] > 0.5).astype(np.intp)
+        bankroll = np.searchsorted(self._bankroll_edges, states[:, 3] * 1000.0)
+        bet = np.searchsorted(self._bet_edges, states[:, 4] * 500)
+        return player_value, dealer_value, usable_ace, bankroll, bet
+
+    def save(self, path):
+        np.savez_compressed(path, q_values=self.q_values, bankrolls=self.bankrolls, bets=self.bets)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['q_values'], data['bankrolls'], data['bets'])
+
+
+class TableAgent:
+    # Greedy agent that answers from a compiled PolicyTable instead of running the network
+    def __init__(self, table):
+        self.table = table
+
+    def act(self, state):
+        player_value = min(int(round(state[0] * 32)), PLAYER_TOTALS - 1)
+        dealer_value = min(int(round(state[1] * 11)), DEALER_UPCARDS - 1)
+        if len(self.table.bankrolls) == 1 and len(self.table.bets) == 1:
+            return int(self.table.actions[player_value, dealer_value, int(state[2] > 0.5), 0, 0])
+        return int(self.table.actions[self.table.index(state)][0])
+
+    def act_batch(self, states):
+        return self.table.actions[self.table.index(states)]
+
+
+def state_grid(bankrolls=DEFAULT_BANKROLLS, bets=DEFAULT_BETS):
+    # Every observation on the table grid, in C order of the table axes
+    player, dealer, ace, bankroll, bet = np.meshgrid(
+        np.arange(PLAYER_TOTALS), np.arange(DEALER_UPCARDS), np.arange(2),
+        np.asarray(bankrolls, dtype=np.float64), np.asarray(bets, dtype=np.float64), indexing='ij')
+    return np.stack([player / 32.0, dealer / 11.0, ace, bankroll / 1000.0, bet / 500], axis=-1).astype(np.float32)
+
+
+def compile_policy(model_path='final_model.pth', bankrolls=DEFAULT_BANKROLLS, bets=DEFAULT_BETS):
+    # torch is only needed to compile; serving from the table does not import it
+    import torch
+    from dqn_agent import build_network
+
+    state_dict = torch.load(model_path, map_location='cpu')
+    state_size = state_dict['0.weight'].shape[1]
+    action_size = state_dict['4.weight'].shape[0]
+    model = build_network(state_size, action_size, hidden_size=state_dict['0.weight'].shape[0])
+    model.load_state_dict(state_dict)
+    model.eval()
+
+    states = state_grid(bankrolls, bets)
+    with torch.no_grad():
+        q_values = model(torch.from_numpy(states.reshape(-1, state_size))).numpy()
+    return PolicyTable(q_values.reshape(states.shape[:-1] + (action_size,)), bankrolls, bets)
+
+
+if __name__ == "__main__":
+    table = compile_policy("final_model.pth")
+    table.save("policy_table.npz")
+    print(f"Compiled {table.actions.size} states into policy_table.npz")
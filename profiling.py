@@ -0,0 +1,127 @@
+import cProfile
+import time
+from contextlib import nullcontext
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    # Reusable timing context for one phase name
+    __slots__ = ('totals', 'name', 'start')
+
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.totals[self.name] += time.perf_counter() - self.start
+
+
+class NullProfiler:
+    """Profiler interface with every hook a no-op, used when profiling is off."""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, n=1):
+        pass
+
+    def episode_start(self, episode):
+        pass
+
+    def episode_end(self, episode):
+        pass
+
+    def close(self):
+        pass
+
+    def summary(self):
+        return {}
+
+    def report(self):
+        return ''
+
+
+class PhaseProfiler(NullProfiler):
+    """Monotonic-clock phase timers and counters for the training loop.
+
+    ``with profiler.phase('act'):`` adds the block's wall time to the 'act' total. Optionally a
+    ``sampler`` ('cprofile' or 'torch') records episodes ``sample_start`` to
+    ``sample_start + sample_episodes - 1`` to ``<output>.prof`` or ``<output>.json`` (a Chrome trace);
+    ``close`` writes a window that is still open when training stops.
+    """
+
+    enabled = True
+
+    def __init__(self, sampler=None, sample_start=0, sample_episodes=10, output='train_profile'):
+        if sampler not in (None, 'cprofile', 'torch'):
+            raise ValueError(f"Unknown sampler: {sampler}")
+        self.sampler = sampler
+        self.sample_start = sample_start
+        self.sample_episodes = sample_episodes
+        self.output = output
+        self.totals = {}
+        self.counts = {}
+        self._phases = {}
+        self._sampling = None
+        self._start_time = time.perf_counter()
+
+    def phase(self, name):
+        phase = self._phases.get(name)
+        if phase is None:
+            self.totals[name] = 0.0
+            phase = self._phases[name] = _Phase(self.totals, name)
+        return phase
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def episode_start(self, episode):
+        if self.sampler and episode == self.sample_start:
+            if self.sampler == 'cprofile':
+                self._sampling = cProfile.Profile()
+                self._sampling.enable()
+            else:
+                import torch.profiler
+                self._sampling = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+                self._sampling.__enter__()
+
+    def episode_end(self, episode):
+        if self._sampling is not None and episode == self.sample_start + self.sample_episodes - 1:
+            self._stop_sampling()
+
+    def close(self):
+        # Writes a sampling window that training ended in the middle of
+        if self._sampling is not None:
+            self._stop_sampling()
+
+    def _stop_sampling(self):
+        if self.sampler == 'cprofile':
+            self._sampling.disable()
+            self._sampling.dump_stats(f"{self.output}.prof")
+        else:
+            self._sampling.__exit__(None, None, None)
+            self._sampling.export_chrome_trace(f"{self.output}.json")
+        self._sampling = None
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._start_time
+        return {
+            'elapsed': elapsed,
+            'phases': dict(self.totals),
+            'counts': dict(self.counts),
+            'steps_per_sec': self.counts.get('steps', 0) / elapsed if elapsed else 0.0,
+        }
+
+    def report(self):
+        summary = self.summary()
+        timed = sum(summary['phases'].values()) or 1.0
+        parts = [f"{name}: {seconds:.2f}s ({seconds / timed:.0%})" for name, seconds in
+                 sorted(summary['phases'].items(), key=lambda item: -item[1])]
+        return f"Time breakdown: {', '.join(parts)} | steps/sec: {summary['steps_per_sec']:.0f}"
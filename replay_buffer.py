@@ -0,0 +1,313 @@
+import json
+import mmap
+import os
+import threading
+
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions stored in preallocated arrays.
+
+    A transition costs ``8 * state_size + 6`` bytes, so tens of millions of
+    them fit in a few GB; pages are only committed by the OS once written.
+    """
+
+    persistent = False  # Whether the transitions outlive the process
+    prioritized = False  # Whether sample() also returns importance weights and indices for update_priorities()
+
+    def __init__(self, capacity, state_size, device='cpu', seed=None):
+        self.capacity = capacity
+        self.device = torch.device(device)
+        self.pin_memory = self.device.type == 'cuda'  # Page-locked staging makes the host->GPU copy async
+        self.rng = np.random.default_rng(seed)
+        self.position = 0  # Slot the next transition is written to
+        self.size = 0
+        self._allocate(state_size)
+
+    def _allocate(self, state_size):
+        self.states = np.empty((self.capacity, state_size), dtype=np.float32)
+        self.next_states = np.empty((self.capacity, state_size), dtype=np.float32)
+        self.actions = np.empty(self.capacity, dtype=np.int8)
+        self.rewards = np.empty(self.capacity, dtype=np.float32)
+        self.dones = np.empty(self.capacity, dtype=np.bool_)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        idx = (self.position + np.arange(len(actions))) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.position = (self.position + len(actions)) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample_indices(self, batch_size):
+        return self.rng.integers(0, self.size, size=batch_size)
+
+    def sample_arrays(self, batch_size):
+        idx = self.sample_indices(batch_size)
+        return (self.states[idx], self.actions[idx].astype(np.int64), self.rewards[idx],
+                self.next_states[idx], self.dones[idx].astype(np.float32))
+
+    def sample(self, batch_size):
+        # Returns (states, actions, rewards, next_states, dones) as tensors on the buffer's device
+        return tuple(self._to_tensor(array) for array in self.sample_arrays(batch_size))
+
+    def _to_tensor(self, array):
+        tensor = torch.from_numpy(array)
+        if self.pin_memory:
+            tensor = tensor.pin_memory()
+        return tensor.to(self.device, non_blocking=True)
+
+
+class MemmapReplayBuffer(ReplayBuffer):
+    """ReplayBuffer whose transitions live in a fixed-record file mapped into memory.
+
+    ``directory`` holds ``transitions.dat`` (one packed record per transition) and ``meta.json``
+    (capacity, write position and size). Opening an existing directory resumes it without reading
+    the records. Where the OS supports it, the mapping is marked for random access, and every
+    ``release_interval`` samples its pages are written back and dropped from the page cache, so long
+    runs over a file much larger than RAM keep a bounded resident set. Adds and samples may come from
+    different threads.
+    """
+
+    persistent = True
+
+    def __init__(self, directory, capacity, state_size, device='cpu', seed=None, release_interval=1000):
+        self.directory = directory
+        self.release_interval = release_interval
+        self._lock = threading.Lock()
+        self._samples_since_release = 0
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, 'transitions.dat')
+        self.meta_path = os.path.join(directory, 'meta.json')
+        super().__init__(capacity, state_size, device=device, seed=seed)
+
+    def _allocate(self, state_size):
+        record = np.dtype([('state', np.float32, (state_size,)), ('action', np.int8), ('reward', np.float32),
+                           ('next_state', np.float32, (state_size,)), ('done', np.bool_)])
+        resume = os.path.exists(self.meta_path)
+        if resume:
+            with open(self.meta_path) as file:
+                meta = json.load(file)
+            if meta['capacity'] != self.capacity or meta['state_size'] != state_size:
+                raise ValueError(f"{self.directory} holds a buffer of capacity {meta['capacity']} and state size "
+                                 f"{meta['state_size']}")
+            self.position = meta['position']
+            self.size = meta['size']
+
+        self._file = open(self.data_path, 'r+b' if resume else 'w+b')
+        self._file.truncate(record.itemsize * self.capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), record.itemsize * self.capacity)
+        if hasattr(mmap, 'MADV_RANDOM'):
+            self._mmap.madvise(mmap.MADV_RANDOM)  # No readahead around sampled records
+        self.records = np.ndarray((self.capacity,), dtype=record, buffer=self._mmap)
+        if not resume:
+            self._write_meta()
+
+        self.states = self.records['state']
+        self.actions = self.records['action']
+        self.rewards = self.records['reward']
+        self.next_states = self.records['next_state']
+        self.dones = self.records['done']
+
+    def add(self, state, action, reward, next_state, done):
+        with self._lock:
+            super().add(state, action, reward, next_state, done)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        with self._lock:
+            super().add_batch(states, actions, rewards, next_states, dones)
+
+    def sample_arrays(self, batch_size):
+        with self._lock:
+            batch = super().sample_arrays(batch_size)
+            self._samples_since_release += 1
+            if self._samples_since_release >= self.release_interval:
+                self._release_pages()
+        return batch
+
+    def _release_pages(self):
+        self._mmap.flush()
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            self._mmap.madvise(mmap.MADV_DONTNEED)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(self._file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        self._samples_since_release = 0
+
+    def _write_meta(self):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({'capacity': self.capacity, 'state_size': self.records.dtype['state'].shape[0],
+                       'position': self.position, 'size': self.size}, file)
+        os.replace(tmp_path, self.meta_path)
+
+    def flush(self):
+        # Makes every transition added so far visible to a later reopen of the directory
+        with self._lock:
+            self._mmap.flush()
+            self._write_meta()
+
+    def close(self):
+        # The mapping is released once the last view of it is gone
+        self.flush()
+        self.records = self.states = self.actions = self.rewards = self.next_states = self.dones = None
+        self._mmap = None
+        self._file.close()
+
+
+class SumTree:
+    """Tree of non-negative values in which every node holds the sum of its ``fanout`` children.
+
+    Each level is one array, leaves first, padded to a multiple of ``fanout`` so a node's children
+    are the block ``[i * fanout, (i + 1) * fanout)`` of the level below. Updates and proportional
+    lookups walk one root-to-leaf path in O(log n), and both take arrays of leaves or values so a
+    whole minibatch costs a few NumPy calls per level; the wide fanout keeps the tree only a few
+    levels deep.
+    """
+
+    def __init__(self, capacity, fanout=32):
+        self.fanout = fanout
+        self.levels = []  # Leaves first, up to a top level of at most fanout nodes
+        size = capacity
+        while True:
+            self.levels.append(np.zeros(-(-size // fanout) * fanout, dtype=np.float64))
+            if size <= fanout:
+                break
+            size = -(-size // fanout)
+        self.leaves = self.levels[0]
+
+    @property
+    def total(self):
+        return self.levels[-1].sum()
+
+    def update(self, indices, values):
+        # Repeated indices keep the last value
+        nodes = np.asarray(indices, dtype=np.int64).reshape(-1)
+        self.leaves[nodes] = values
+        for child, parent in zip(self.levels, self.levels[1:]):
+            nodes = nodes // self.fanout
+            parent[nodes] = child.reshape(-1, self.fanout)[nodes].sum(1)
+
+    def rebuild(self, values):
+        # Sets all leaves at once and recomputes every sum, level by level
+        self.leaves[:len(values)] = values
+        for child, parent in zip(self.levels, self.levels[1:]):
+            sums = child.reshape(-1, self.fanout).sum(1)
+            parent[:len(sums)] = sums
+
+    def find(self, values):
+        # Leaf index whose cumulative sum range contains each value in [0, total)
+        values = np.array(values, dtype=np.float64)
+        rows = np.arange(len(values))
+        top = np.add.accumulate(self.levels[-1])
+        nodes = np.minimum(np.searchsorted(top, values, side='right'), len(top) - 1)
+        values -= top[nodes] - self.levels[-1][nodes]
+        for level in reversed(self.levels[:-1]):
+            children = level.reshape(-1, self.fanout)[nodes]
+            sums = np.add.accumulate(children, axis=1)
+            child = (sums > values[:, None]).argmax(1)  # First child whose running sum passes the value
+            values -= sums[rows, child] - children[rows, child]
+            nodes = nodes * self.fanout + child
+        return nodes
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """ReplayBuffer that samples transitions in proportion to their TD error (Schaul et al., 2016).
+
+    Transition ``i`` is drawn with probability ``p_i^alpha / sum_k p_k^alpha``, where ``p_i`` is its last
+    absolute TD error plus ``priority_epsilon``; new transitions get the highest priority seen so far so
+    they are replayed at least once. Each minibatch is stratified over the sum-tree and comes with
+    importance-sampling weights ``(N * P(i))^-beta``, scaled so the largest in the batch is 1. ``alpha``
+    and ``beta`` move linearly to ``alpha_final`` and ``beta_final`` over ``anneal_steps`` samples.
+    """
+
+    prioritized = True
+
+    def __init__(self, capacity, state_size, device='cpu', seed=None, alpha=0.6, beta=0.4, alpha_final=None,
+                 beta_final=1.0, anneal_steps=10000, priority_epsilon=1e-3):
+        super().__init__(capacity, state_size, device=device, seed=seed)
+        self.alpha_start, self.alpha_final = alpha, alpha if alpha_final is None else alpha_final
+        self.beta_start, self.beta_final = beta, beta_final
+        self.anneal_steps = anneal_steps
+        self.priority_epsilon = priority_epsilon
+        self.alpha, self.beta = alpha, beta
+        self.sample_steps = 0
+        self.max_priority = 1.0
+        self.priorities = np.zeros(capacity, dtype=np.float64)  # p_i, before the alpha exponent
+        self.tree = SumTree(capacity)
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        super().add(state, action, reward, next_state, done)
+        self._set_priorities(i, self.max_priority)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        idx = (self.position + np.arange(len(actions))) % self.capacity
+        super().add_batch(states, actions, rewards, next_states, dones)
+        self._set_priorities(idx, self.max_priority)
+
+    def _set_priorities(self, indices, priorities):
+        self.priorities[indices] = priorities
+        self.tree.update(indices, self.priorities[indices] ** self.alpha)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + self.priority_epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self._set_priorities(indices, priorities)
+
+    def _anneal(self):
+        self.sample_steps += 1
+        fraction = min(self.sample_steps / self.anneal_steps, 1.0)
+        self.beta = self.beta_start + fraction * (self.beta_final - self.beta_start)
+        alpha = self.alpha_start + fraction * (self.alpha_final - self.alpha_start)
+        if alpha != self.alpha:
+            # Changing the exponent touches every leaf; one vectorized pass over the stored priorities
+            self.alpha = alpha
+            self.tree.rebuild(self.priorities[:self.size] ** alpha)
+
+    def sample_indices(self, batch_size):
+        # One draw from each of batch_size equal slices of the total priority
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample_arrays(self, batch_size):
+        # The uniform sample plus importance-sampling weights and the indices to pass to update_priorities
+        self._anneal()
+        idx = self.sample_indices(batch_size)
+        probabilities = self.tree.leaves[idx] / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        return (self.states[idx], self.actions[idx].astype(np.int64), self.rewards[idx],
+                self.next_states[idx], self.dones[idx].astype(np.float32), weights, idx)
+
+    def sample(self, batch_size):
+        # (states, actions, rewards, next_states, dones, weights) as tensors, plus the sampled indices
+        *arrays, idx = self.sample_arrays(batch_size)
+        return (*(self._to_tensor(array) for array in arrays), idx)
+
+    def priority_state(self):
+        return {'max_priority': self.max_priority, 'sample_steps': self.sample_steps}
+
+    def restore_priorities(self, priorities, state):
+        self.priorities[:len(priorities)] = priorities
+        self.max_priority = state['max_priority']
+        self.sample_steps = state['sample_steps'] - 1
+        self._anneal()  # Brings alpha and beta back to where sampling left them
+        self.tree.rebuild(self.priorities[:self.size] ** self.alpha)
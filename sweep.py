@@ -0,0 +1,254 @@
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# Default search space over the DQNAgent and train_dqn hyperparameters. A list is a set of choices;
+# ('log', low, high) and ('uniform', low, high) are continuous ranges.
+DEFAULT_SPACE = {
+    'gamma': ('uniform', 0.9, 0.999),
+    'epsilon_decay': ('uniform', 0.99, 0.9995),
+    'learning_rate': ('log', 1e-4, 3e-3),
+    'hidden_size': [32, 64, 128, 256],
+    'batch_size': [32, 64, 128],
+}
+AGENT_OPTIONS = ('gamma', 'epsilon_decay', 'epsilon_min', 'learning_rate', 'hidden_size', 'prioritized_replay')
+
+
+def sample_config(space, rng):
+    config = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            config[name] = spec[int(rng.integers(len(spec)))]
+        elif spec[0] == 'log':
+            config[name] = float(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2]))))
+        elif spec[0] == 'uniform':
+            config[name] = float(rng.uniform(spec[1], spec[2]))
+        else:
+            raise ValueError(f"Unknown search space entry for {name}: {spec}")
+        if isinstance(config[name], np.generic):
+            config[name] = config[name].item()
+    return config
+
+
+def rung_budgets(min_episodes, max_episodes, reduction_factor):
+    # Cumulative training episodes at each rung: min_episodes * eta^k, capped at max_episodes
+    budgets = [min_episodes]
+    while budgets[-1] < max_episodes:
+        budgets.append(min(budgets[-1] * reduction_factor, max_episodes))
+    return budgets
+
+
+def _init_worker():
+    import torch
+    torch.set_num_threads(1)  # One core per trial
+
+
+def run_trial(trial_id, config, seed, start_episode, episodes, checkpoint_path, eval_hands, eval_seed):
+    """Trains a trial from start_episode up to episodes (resuming its checkpoint), then scores its greedy policy.
+
+    The score is the negated house edge from evaluator.evaluate over eval_hands hands with a shared eval_seed,
+    so every trial is evaluated on the same shoes.
+    """
+    from bankroll_store import BankrollStore
+    from blackjack_env import BlackjackEnv
+    from checkpoint import load_checkpoint, save_checkpoint
+    from dqn_agent import DQNAgent
+    from evaluator import evaluate
+
+    start = time.perf_counter()
+    # The card stream is derived from the trial seed and rung; the agent's streams come back with its checkpoint
+    env_rng, agent_rng = np.random.default_rng([seed, start_episode]).spawn(2)
+    env = BlackjackEnv(bankroll_store=BankrollStore(), seed=env_rng)
+    agent = DQNAgent(env, seed=agent_rng, **{k: v for k, v in config.items() if k in AGENT_OPTIONS})
+    trained = start_episode - 1  # Last episode already trained
+    if start_episode or os.path.exists(checkpoint_path):
+        # A rerun job killed between its checkpoint and its result finds the checkpoint already at this rung
+        trained = load_checkpoint(agent, checkpoint_path)
+    batch_size = config.get('batch_size', 64)
+
+    for _ in range(trained + 1, episodes):
+        state = env.reset()
+        for _ in range(500):  # Limit each episode to 500 steps, as in train_dqn
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            agent.remember(state, action, reward, next_state, done)
+            state = next_state
+            if done:
+                break
+        if len(agent.memory) > batch_size:
+            agent.replay(batch_size)
+    if trained < episodes - 1:
+        save_checkpoint(agent, episodes - 1, checkpoint_path)
+
+    epsilon, agent.epsilon = agent.epsilon, 0.0
+    report = evaluate(agent, num_tables=1024, target_se=0.0, min_hands=eval_hands, max_hands=eval_hands,
+                      seed=eval_seed)
+    agent.epsilon = epsilon
+    return {
+        'type': 'result',
+        'trial': trial_id,
+        'episodes': episodes,
+        'score': -report['house_edge']['mean'],
+        'house_edge': report['house_edge']['mean'],
+        'win_rate': report['win_rate']['mean'],
+        'reward': report['reward']['mean'],
+        'seconds': time.perf_counter() - start,
+    }
+
+
+class Sweep:
+    """Asynchronous successive halving (ASHA) over sampled configurations, run on a process pool.
+
+    Every trial first trains for ``min_episodes``; a trial in the top 1/``reduction_factor`` of the scores
+    reported at a rung is promoted to train on (from its checkpoint) to the next rung's budget, up to
+    ``max_episodes``. Free workers take a promotion when one is available and start a new trial otherwise,
+    so no worker waits for a rung to fill. Trials and results are appended to ``directory/results.jsonl``;
+    running the same sweep again resumes from it.
+    """
+
+    def __init__(self, directory, space=None, num_trials=32, min_episodes=100, max_episodes=2700,
+                 reduction_factor=3, workers=None, eval_hands=20000, seed=0):
+        self.directory = directory
+        self.space = space or DEFAULT_SPACE
+        self.num_trials = num_trials
+        self.budgets = rung_budgets(min_episodes, max_episodes, reduction_factor)
+        self.reduction_factor = reduction_factor
+        self.workers = workers or os.cpu_count() or 1
+        self.eval_hands = eval_hands
+        self.seed = seed
+        self.results_path = os.path.join(directory, 'results.jsonl')
+        os.makedirs(directory, exist_ok=True)
+
+        self.trials = {}  # trial id -> {'config', 'seed'}
+        self.scores = [dict() for _ in self.budgets]  # rung -> {trial id: score}
+        self.promoted = [set() for _ in self.budgets]  # Trials already sent on from each rung
+        self.results = []
+        self.pending = []  # (trial id, rung) jobs cut short by a previous run, rerun before anything else
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.results_path):
+            return
+        jobs = {}  # (trial id, rung) submitted, in order
+        with open(self.results_path) as file:
+            for line in file:
+                record = json.loads(line)
+                if record['type'] == 'trial':
+                    self.trials[record['trial']] = {'config': record['config'], 'seed': record['seed']}
+                    jobs[record['trial'], 0] = True
+                elif record['type'] == 'job':
+                    rung = self.budgets.index(record['episodes'])
+                    jobs[record['trial'], rung] = True
+                    if rung > 0:
+                        self.promoted[rung - 1].add(record['trial'])
+                else:
+                    self._record_result(record)
+        # A job running when the sweep stopped left no result; it is rerun from the previous rung's checkpoint
+        self.pending = [(trial_id, rung) for trial_id, rung in jobs if trial_id not in self.scores[rung]]
+
+    def _append(self, record):
+        with open(self.results_path, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+
+    def _record_result(self, record):
+        rung = self.budgets.index(record['episodes'])
+        self.scores[rung][record['trial']] = record['score']
+        if rung > 0:
+            self.promoted[rung - 1].add(record['trial'])
+        self.results.append(record)
+
+    def _new_trial(self):
+        trial_id = len(self.trials)
+        rng = np.random.default_rng([self.seed, trial_id])
+        trial = {'config': sample_config(self.space, rng), 'seed': int(rng.integers(2 ** 63))}
+        self.trials[trial_id] = trial
+        self._append({'type': 'trial', 'trial': trial_id, **trial})
+        return trial_id
+
+    def _next_job(self, running):
+        if self.pending:
+            return self.pending.pop(0)
+        # Highest rung first: promote the best unpromoted trial in the top 1/eta of a rung's results
+        for rung in reversed(range(len(self.budgets) - 1)):
+            scores = self.scores[rung]
+            top = sorted(scores, key=scores.get, reverse=True)[:len(scores) // self.reduction_factor]
+            for trial_id in top:
+                if trial_id not in self.promoted[rung] and trial_id not in running:
+                    self.promoted[rung].add(trial_id)
+                    return trial_id, rung + 1
+        if len(self.trials) < self.num_trials:
+            return self._new_trial(), 0
+        return None
+
+    def _submit(self, pool, trial_id, rung):
+        trial = self.trials[trial_id]
+        start_episode = self.budgets[rung - 1] if rung else 0
+        self._append({'type': 'job', 'trial': trial_id, 'episodes': self.budgets[rung]})
+        return pool.submit(run_trial, trial_id, trial['config'], trial['seed'], start_episode, self.budgets[rung],
+                           os.path.join(self.directory, f"trial-{trial_id:04d}.npz"), self.eval_hands, self.seed)
+
+    def run(self):
+        start = time.perf_counter()
+        ctx = mp.get_context('spawn')
+        with ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_init_worker) as pool:
+            running = {}  # future -> trial id
+            while True:
+                while len(running) < self.workers:
+                    job = self._next_job(set(running.values()))
+                    if job is None:
+                        break
+                    running[self._submit(pool, *job)] = job[0]
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    record = future.result()
+                    self._append(record)
+                    self._record_result(record)
+                    print(f"Trial {record['trial']} at {record['episodes']} episodes: house edge"
+                          f" {record['house_edge']:.2%}, reward {record['reward']:.3f} ({record['seconds']:.1f}s)")
+        print(f"Sweep finished in {time.perf_counter() - start:.1f}s")
+        return self.leaderboard()
+
+    def leaderboard(self):
+        # Trials ranked by their score at the highest rung they reached
+        best = {}
+        for record in self.results:
+            current = best.get(record['trial'])
+            if current is None or record['episodes'] > current['episodes']:
+                best[record['trial']] = record
+        ranked = sorted(best.values(), key=lambda record: (record['episodes'], record['score']), reverse=True)
+        return [dict(record, config=self.trials[record['trial']]['config']) for record in ranked]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ASHA hyperparameter sweep for the DQN agent")
+    parser.add_argument('--directory', default='sweep', help="results file and trial checkpoints")
+    parser.add_argument('--space', help="JSON file with a search space (default: sweep.DEFAULT_SPACE)")
+    parser.add_argument('--trials', type=int, default=32)
+    parser.add_argument('--min-episodes', type=int, default=100)
+    parser.add_argument('--max-episodes', type=int, default=2700)
+    parser.add_argument('--reduction-factor', type=int, default=3)
+    parser.add_argument('--workers', type=int, help="parallel trials (default: one per core)")
+    parser.add_argument('--eval-hands', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space) as file:
+            space = {name: tuple(spec) if isinstance(spec, list) and isinstance(spec[0], str) else spec
+                     for name, spec in json.load(file).items()}
+    sweep = Sweep(args.directory, space, num_trials=args.trials, min_episodes=args.min_episodes,
+                  max_episodes=args.max_episodes, reduction_factor=args.reduction_factor, workers=args.workers,
+                  eval_hands=args.eval_hands, seed=args.seed)
+    for record in sweep.run()[:5]:
+        print(f"Trial {record['trial']}: {record['episodes']} episodes, house edge {record['house_edge']:.2%},"
+              f" config {record['config']}")
@@ -0,0 +1,262 @@
+import bisect
+import json
+import os
+import queue
+import threading
+import zlib
+
+import numpy as np
+
+from game_logic import Card
+
+# Cards a hand can hold, bust card included: with 6 decks, 21 aces count 21 before a 22nd card busts
+MAX_CARDS = 22
+NO_CARD = 255  # Padding in the card columns
+
+
+def record_dtype(state_size=5, max_cards=MAX_CARDS):
+    return np.dtype([
+        ('game', np.uint64),
+        ('step', np.uint16),
+        ('state', np.float32, (state_size,)),
+        ('action', np.int8),
+        ('reward', np.float32),
+        ('next_state', np.float32, (state_size,)),
+        ('done', np.bool_),
+        ('player_cards', np.uint8, (max_cards,)),
+        ('dealer_cards', np.uint8, (max_cards,)),
+        ('bet', np.float32),
+    ])
+
+
+# One entry per compressed chunk, appended to index.bin as chunks are written
+INDEX_DTYPE = np.dtype([
+    ('shard', np.uint32),
+    ('offset', np.uint64),
+    ('length', np.uint32),
+    ('records', np.uint32),
+    ('first_game', np.uint64),
+    ('last_game', np.uint64),
+])
+
+
+class TrajectoryRecorder:
+    """Streams fixed-width step records into zlib-compressed chunks of shard files.
+
+    Steps fill a preallocated chunk of ``chunk_records`` records; full chunks are compressed and
+    appended to ``shard-NNNNN.bin`` by a background thread, starting a new shard past ``shard_bytes``.
+    Memory stays at a few chunks whatever the number of games. Call ``close`` to write the last chunk.
+    A failed write stops the recording and is raised from the next full chunk or ``close``.
+    """
+
+    def __init__(self, directory, state_size=5, chunk_records=4096, shard_bytes=64 << 20, compression_level=6):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dtype = record_dtype(state_size)
+        self.chunk_records = chunk_records
+        self.shard_bytes = shard_bytes
+        self.compression_level = compression_level
+        with open(os.path.join(directory, 'meta.json'), 'w') as file:
+            json.dump({'state_size': state_size, 'max_cards': MAX_CARDS}, file)
+
+        self.game = -1
+        self.step = 0
+        self._chunk = np.zeros(chunk_records, dtype=self.dtype)
+        self._filled = 0
+        self._shard = 0
+        self._shard_size = 0
+        self._index = open(os.path.join(directory, 'index.bin'), 'wb')
+        self._queue = queue.Queue(maxsize=2)  # Blocks the caller if compression falls behind
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='trajectory-writer', daemon=True)
+        self._thread.start()
+
+    def start_game(self):
+        self.game += 1
+        self.step = 0
+        return self.game
+
+    def record(self, state, action, reward, next_state, done, player_cards, dealer_cards, bet):
+        row = self._chunk[self._filled]
+        row['game'] = self.game
+        row['step'] = self.step
+        row['state'] = state
+        row['action'] = action
+        row['reward'] = reward
+        row['next_state'] = next_state
+        row['done'] = done
+        row['player_cards'] = NO_CARD
+        row['player_cards'][:len(player_cards)] = player_cards
+        row['dealer_cards'] = NO_CARD
+        row['dealer_cards'][:len(dealer_cards)] = dealer_cards
+        row['bet'] = bet
+        self.step += 1
+        self._filled += 1
+        if self._filled == self.chunk_records:
+            self._submit()
+
+    def _submit(self):
+        if self._filled:
+            self._put(self._chunk[:self._filled].copy())
+            self._filled = 0
+
+    def _put(self, item):
+        while True:
+            self._raise_error()
+            if not self._thread.is_alive():
+                raise RuntimeError("Trajectory writer thread has stopped")
+            try:
+                self._queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                pass
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        shard_file = None
+        failed = False
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if failed:
+                continue  # Drain without writing, so the shards keep a consistent index up to the failure
+            try:
+                shard_file = self._write_chunk(chunk, shard_file)
+            except Exception as error:
+                self._error = error
+                failed = True
+        if shard_file is not None:
+            shard_file.close()
+
+    def _write_chunk(self, chunk, shard_file):
+        data = zlib.compress(chunk.tobytes(), self.compression_level)
+        if shard_file is None or self._shard_size >= self.shard_bytes:
+            if shard_file is not None:
+                shard_file.close()
+                self._shard += 1
+            shard_file = open(os.path.join(self.directory, f"shard-{self._shard:05d}.bin"), 'wb')
+            self._shard_size = 0
+        shard_file.write(data)
+        entry = np.array([(self._shard, self._shard_size, len(data), len(chunk), chunk['game'][0],
+                           chunk['game'][-1])], dtype=INDEX_DTYPE)
+        self._shard_size += len(data)
+        shard_file.flush()
+        self._index.write(entry.tobytes())
+        self._index.flush()
+        return shard_file
+
+    def close(self):
+        try:
+            self._submit()
+        finally:
+            if self._thread.is_alive():
+                self._queue.put(None)  # The writer keeps draining the queue even after a failed write
+                self._thread.join()
+            self._index.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    """Reads shards written by TrajectoryRecorder, one decompressed chunk at a time."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as file:
+            meta = json.load(file)
+        self.dtype = record_dtype(meta['state_size'], meta['max_cards'])
+        self.index = np.fromfile(os.path.join(directory, 'index.bin'), dtype=INDEX_DTYPE)
+        self._last_games = self.index['last_game'].tolist()
+        self._cached = (None, None)  # Last chunk read, for consecutive random accesses
+
+    @property
+    def num_games(self):
+        return int(self.index['last_game'][-1]) + 1 if len(self.index) else 0
+
+    @property
+    def num_records(self):
+        return int(self.index['records'].sum())
+
+    def read_chunk(self, i):
+        if self._cached[0] == i:
+            return self._cached[1]
+        entry = self.index[i]
+        with open(os.path.join(self.directory, f"shard-{int(entry['shard']):05d}.bin"), 'rb') as file:
+            file.seek(int(entry['offset']))
+            data = file.read(int(entry['length']))
+        chunk = np.frombuffer(zlib.decompress(data), dtype=self.dtype)
+        self._cached = (i, chunk)
+        return chunk
+
+    def iter_chunks(self):
+        for i in range(len(self.index)):
+            yield self.read_chunk(i)
+
+    def iter_games(self):
+        # Yields the record array of every game in order; games may straddle chunk boundaries
+        pending = []
+        for chunk in self.iter_chunks():
+            if pending and pending[-1]['game'][0] != chunk['game'][0]:
+                yield np.concatenate(pending)
+                pending = []
+            boundaries = np.flatnonzero(np.diff(chunk['game'])) + 1
+            pieces = np.split(chunk, boundaries)
+            for piece in pieces[:-1]:
+                pending.append(piece)
+                yield np.concatenate(pending)
+                pending = []
+            pending.append(pieces[-1])
+        if pending:
+            yield np.concatenate(pending)
+
+    def game(self, game_id):
+        # Random access: only the chunks whose game range covers game_id are decompressed, starting from the
+        # first chunk that ends at or after it, since a game can begin in an earlier chunk than it ends in
+        parts = []
+        i = bisect.bisect_left(self._last_games, game_id)
+        while i < len(self.index) and self.index['first_game'][i] <= game_id:
+            chunk = self.read_chunk(i)
+            parts.append(chunk[chunk['game'] == game_id])
+            i += 1
+        if not parts:
+            raise KeyError(f"No game {game_id} in {self.directory}")
+        return np.concatenate(parts)
+
+
+def _cards(column):
+    return [str(Card.from_code(int(card))) for card in column if card != NO_CARD]
+
+
+def game_to_dict(records):
+    return {
+        'game': int(records['game'][0]),
+        'steps': [{
+            'state': row['state'].tolist(),
+            'action': int(row['action']),
+            'reward': float(row['reward']),
+            'next_state': row['next_state'].tolist(),
+            'done': bool(row['done']),
+            'dealer_cards': _cards(row['dealer_cards']),
+            'player_cards': _cards(row['player_cards']),
+            'bet': float(row['bet']),
+            'win_loss': 'win' if row['reward'] > 0 else 'loss' if row['reward'] < 0 else 'tie',
+        } for row in records],
+    }
+
+
+def to_json(directory, json_file, games=None):
+    # Writes the given game ids (all games if None) in the JSON layout of the old behaviour log
+    reader = TrajectoryReader(directory)
+    records = reader.iter_games() if games is None else (reader.game(game_id) for game_id in games)
+    with open(json_file, 'w') as f:
+        json.dump([game_to_dict(game) for game in records], f, indent=4)
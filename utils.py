@@ -1,43 +1,48 @@
 import matplotlib.pyplot as plt
 
-def plot_stats(rewards, cumulative_rewards, balances, total_wins, total_losses, player_values, dealer_values, actions_taken, bet_amounts, episodes, env):
+def plot_stats(metrics, path=None):
+    # Plots the downsampled series of a TrainingMetrics; writes a PNG to path instead of showing when given
     plt.figure(figsize=(20, 10))
 
     plt.subplot(2, 3, 1)
-    plt.plot(rewards)
+    plt.plot(*metrics.rewards.points())
     plt.xlabel('Episodes')
     plt.ylabel('Reward')
     plt.title('Reward per Episode')
 
     plt.subplot(2, 3, 2)
-    plt.plot(cumulative_rewards)
+    plt.plot(*metrics.cumulative_rewards.points())
     plt.xlabel('Episodes')
     plt.ylabel('Cumulative Reward')
     plt.title('Cumulative Reward')
 
     plt.subplot(2, 3, 3)
-    plt.plot(balances)
+    plt.plot(*metrics.balances.points())
     plt.xlabel('Episodes')
     plt.ylabel('Balance')
     plt.title('Player Balance Over Time')
 
     plt.subplot(2, 3, 4)
-    plt.bar(['Wins', 'Losses'], [total_wins, total_losses])
+    plt.bar(['Wins', 'Losses'], [metrics.total_wins, metrics.total_losses])
     plt.title('Total Wins vs Losses')
 
     plt.subplot(2, 3, 5)
-    plt.plot(bet_amounts)
-    plt.xlabel('Episodes')
+    plt.plot(*metrics.bet_amounts.points())
+    plt.xlabel('Steps')
     plt.ylabel('Bet Amount')
     plt.title('Bet Amounts Over Time')
 
     plt.subplot(2, 3, 6)
-    plt.plot(player_values, label='Player Hand Value')
-    plt.plot(dealer_values, label='Dealer Hand Value')
-    plt.xlabel('Episodes')
+    plt.plot(*metrics.player_values.points(), label='Player Hand Value')
+    plt.plot(*metrics.dealer_values.points(), label='Dealer Hand Value')
+    plt.xlabel('Steps')
     plt.ylabel('Hand Value')
     plt.legend()
     plt.title('Player and Dealer Hand Values Over Episodes')
 
     plt.tight_layout()
-    plt.show()
+    if path:
+        plt.savefig(path)
+        plt.close()
+    else:
+        plt.show()
@@ -0,0 +1,194 @@
+import numpy as np
+from gym import spaces
+from bankroll_store import default_store
+from game_logic import ACE, RANK_VALUES
+
+# Shoes only hold card ranks (see game_logic.VALUES), suits never matter to the env
+HARD_VALUES = np.where(np.arange(13) == ACE, 1, RANK_VALUES).astype(np.int16)  # Ace counted as 1
+
+# win_loss codes reported in the step infos
+NO_RESULT = 0
+PLAYER_WIN = 1
+DEALER_WIN = 2
+PUSH = 3
+
+
+class VecBlackjackEnv:
+    """Runs ``num_envs`` independent BlackjackEnv tables on NumPy arrays.
+
+    Observations, rewards and bankroll updates follow ``BlackjackEnv`` exactly;
+    tables whose hand finished are dealt a new one within the same ``step``.
+    """
+
+    def __init__(self, num_envs=1, num_decks=6, initial_money=None, seed=None):
+        self.num_envs = num_envs
+        self.num_decks = num_decks
+        self.observation_space = spaces.Box(low=0, high=1, shape=(5,), dtype=np.float32)
+        self.action_space = spaces.Discrete(3)  # 0: Stand, 1: Hit, 2: Double
+        self.min_bet = 10  # Minimum bet amount
+        self.max_bet = 500  # Maximum bet amount
+        self.rng = np.random.default_rng(seed)
+
+        if initial_money is None:
+            initial_money = default_store().load('player_money', 10000)
+        self.money = np.full(num_envs, initial_money, dtype=np.float64)
+        self.current_bet = np.zeros(num_envs, dtype=np.float64)
+        self.hand_start_money = np.zeros(num_envs, dtype=np.float64)  # Bankroll before the current hand's bet
+
+        # One shoe per table, drawn front to back and reshuffled once exhausted
+        self.shoe_size = 52 * num_decks
+        shoe = np.tile(np.arange(13, dtype=np.uint8), 4 * num_decks)
+        self.shoes = self.rng.permuted(np.tile(shoe, (num_envs, 1)), axis=1)
+        self.cursor = np.zeros(num_envs, dtype=np.int64)
+
+        # Hands are kept as hard totals (aces as 1) plus an ace count
+        self.player_hard = np.zeros(num_envs, dtype=np.int16)
+        self.player_aces = np.zeros(num_envs, dtype=np.int16)
+        self.dealer_hard = np.zeros(num_envs, dtype=np.int16)
+        self.dealer_aces = np.zeros(num_envs, dtype=np.int16)
+        self.dealer_upcard = np.zeros(num_envs, dtype=np.uint8)
+
+    def reset(self):
+        self._reset_tables(np.arange(self.num_envs))
+        return self._get_state()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        player_value = self._hand_value(self.player_hard, self.player_aces)
+        has_ace = self.player_aces > 0
+
+        done = actions == 0  # Stand
+
+        hit = np.flatnonzero(actions == 1)
+        if hit.size:
+            self._deal(self.player_hard, self.player_aces, hit)
+            player_value[hit] = self._hand_value(self.player_hard[hit], self.player_aces[hit])
+            rewards[hit] = self._hit_reward(player_value[hit])
+            rewards[hit] += np.where(has_ace[hit] & (player_value[hit] < 15), 0.5, 0.0)
+            done[hit] = player_value[hit] > 21
+
+        # Player.can_double_down counts every ace as 11
+        raw_total = self.player_hard + 10 * self.player_aces
+        double = np.flatnonzero((actions == 2) & (raw_total >= 9) & (raw_total <= 11))
+        if double.size:
+            self.money[double] -= self.current_bet[double]
+            self.current_bet[double] *= 2
+            self._deal(self.player_hard, self.player_aces, double)
+            player_value[double] = self._hand_value(self.player_hard[double], self.player_aces[double])
+            done[double] = True
+
+        infos = {
+            'player_value': np.zeros(self.num_envs, dtype=np.int16),
+            'dealer_value': np.zeros(self.num_envs, dtype=np.int16),
+            'win_loss': np.full(self.num_envs, NO_RESULT, dtype=np.int8),
+            'bet_amount': self.current_bet.copy(),
+            'net_winnings': np.zeros(self.num_envs, dtype=np.float64),  # Bankroll change over a finished hand
+        }
+
+        finished = np.flatnonzero(done)
+        if finished.size:
+            # As in BlackjackEnv.step, a finished hand is rewarded by the settlement alone
+            rewards[finished] = self._end_round(finished, player_value[finished], infos)
+            infos['net_winnings'][finished] = self.money[finished] - self.hand_start_money[finished]
+            infos['final_observation'] = self._get_state()
+            self._reset_tables(finished)
+
+        return self._get_state(), rewards, done, infos
+
+    def progressive_betting_strategy(self, balance):
+        base_bet = self.min_bet
+        bet_amount = np.where(balance > 10000, base_bet * 2, np.where(balance > 5000, base_bet * 1.5, base_bet))
+        bet_amount = np.clip(bet_amount, self.min_bet, self.max_bet)
+        return np.floor(bet_amount)
+
+    def _reset_tables(self, idx):
+        self.hand_start_money[idx] = self.money[idx]
+        bet_amount = self.progressive_betting_strategy(self.money[idx])
+        self.current_bet[idx] = bet_amount
+        self.money[idx] -= bet_amount
+
+        self.player_hard[idx] = 0
+        self.player_aces[idx] = 0
+        self.dealer_hard[idx] = 0
+        self.dealer_aces[idx] = 0
+        self._deal(self.player_hard, self.player_aces, idx)
+        self._deal(self.player_hard, self.player_aces, idx)
+        self.dealer_upcard[idx] = self._deal(self.dealer_hard, self.dealer_aces, idx)
+        self._deal(self.dealer_hard, self.dealer_aces, idx)
+
+        # Naturals are paid out on the deal, and the hand stays open like in BlackjackEnv.reset
+        player_value = self._hand_value(self.player_hard[idx], self.player_aces[idx])
+        dealer_value = self._hand_value(self.dealer_hard[idx], self.dealer_aces[idx])
+        natural = player_value == 21
+        self.money[idx] += np.where(natural, np.where(dealer_value == 21, 1, 2) * bet_amount, 0)
+
+    def _end_round(self, idx, player_value, infos):
+        # The dealer only draws when not already ahead of the player
+        dealer_value = self._hand_value(self.dealer_hard[idx], self.dealer_aces[idx])
+        drawing = dealer_value <= player_value
+        while True:
+            draw = idx[drawing & (dealer_value < 17)]
+            if draw.size == 0:
+                break
+            self._deal(self.dealer_hard, self.dealer_aces, draw)
+            dealer_value = self._hand_value(self.dealer_hard[idx], self.dealer_aces[idx])
+
+        winner = np.where(player_value > 21, DEALER_WIN,
+                          np.where((dealer_value > 21) | (player_value > dealer_value), PLAYER_WIN,
+                                   np.where(player_value == dealer_value, PUSH, DEALER_WIN)))
+
+        bet_amount = self.current_bet[idx]
+        reward = self._calculate_reward(winner, player_value, bet_amount, self.money[idx])
+        reward -= np.where(winner == DEALER_WIN, np.minimum(bet_amount * 0.05, 5), 0)  # Proportional penalty for losing
+        self.money[idx] += np.where(winner == PLAYER_WIN, 2 * bet_amount, np.where(winner == PUSH, bet_amount, 0))
+
+        infos['player_value'][idx] = player_value
+        infos['dealer_value'][idx] = dealer_value
+        infos['win_loss'][idx] = winner
+        return reward
+
+    def _deal(self, hard, aces, idx):
+        exhausted = idx[self.cursor[idx] >= self.shoe_size]
+        if exhausted.size:
+            self.shoes[exhausted] = self.rng.permuted(self.shoes[exhausted], axis=1)
+            self.cursor[exhausted] = 0
+        cards = self.shoes[idx, self.cursor[idx]]
+        self.cursor[idx] += 1
+        hard[idx] += HARD_VALUES[cards]
+        aces[idx] += cards == ACE
+        return cards
+
+    @staticmethod
+    def _hand_value(hard, aces):
+        return np.where((aces > 0) & (hard + 10 <= 21), hard + 10, hard)
+
+    def _get_state(self):
+        player_value = self._hand_value(self.player_hard, self.player_aces)
+        usable_ace = (self.player_aces > 0) & (player_value + 10 <= 21)
+        return np.stack([
+            player_value / 32.0,
+            RANK_VALUES[self.dealer_upcard] / 11.0,
+            usable_ace,
+            self.money / 1000.0,  # Normalize bankroll for state representation
+            self.current_bet / 500,
+        ], axis=1).astype(np.float32)
+
+    @staticmethod
+    def _hit_reward(player_value):
+        reward = np.select(
+            [player_value <= 13, player_value <= 16, player_value == 21, player_value > 21],
+            [1.0, 0.3, 2.0, -1.0], 0.0)
+        reward += np.where((player_value > 11) & (player_value <= 20), 0.2, 0.0)
+        reward -= np.where(player_value >= 18, 1.0, 0.0)
+        return reward
+
+    @staticmethod
+    def _calculate_reward(winner, player_value, bet_amount, money):
+        max_penalty = np.minimum(money * 0.05, 5)  # Cap penalty to 5% of wallet or 5
+        dealer_penalty = np.select(
+            [player_value > 21, (player_value >= 17) & (player_value <= 21), (player_value >= 3) & (player_value < 11)],
+            [2.0, 0.5, max_penalty], 2.0)
+        return np.select(
+            [winner == PLAYER_WIN, winner == DEALER_WIN, winner == PUSH],
+            [5 + np.minimum(bet_amount * 0.05, 10), -dealer_penalty, 0.5], 0.0)